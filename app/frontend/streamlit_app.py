@@ -3,40 +3,14 @@ Streamlit Frontend for Recruitment AI Agent
 """
 import streamlit as st
 import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-from typing import List
-import json
-
-# Local document extraction for frontend
-def extract_text_from_upload(uploaded_file):
-    """Extract text from uploaded file"""
-    try:
-        file_ext = os.path.splitext(uploaded_file.name)[1].lower()
-        
-        if file_ext == '.pdf':
-            import PyPDF2
-            import io
-            uploaded_file.seek(0)  # Reset file pointer
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(uploaded_file.read()))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
-        elif file_ext in ['.doc', '.docx']:
-            from docx import Document
-            import io
-            uploaded_file.seek(0)  # Reset file pointer
-            doc = Document(io.BytesIO(uploaded_file.read()))
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-        elif file_ext == '.txt':
-            uploaded_file.seek(0)  # Reset file pointer
-            return uploaded_file.read().decode('utf-8')
-        else:
-            return ""
-    except Exception as e:
-        st.error(f"Error extracting text: {str(e)}")
-        return ""
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+import orjson
 
 # Page config
 st.set_page_config(
@@ -48,6 +22,109 @@ st.set_page_config(
 # API Base URL
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
 
+# (connect, read) timeouts in seconds; LLM-backed endpoints get a longer read window
+_TIMEOUT = (5, 60)
+_LLM_TIMEOUT = (5, 300)
+
+class ProviderContext(NamedTuple):
+    """Sidebar AI settings shared by the tab renderers"""
+    provider_code: str
+    api_key: Optional[str]
+    use_ai: bool
+
+
+# (minimum score, color) pairs, highest threshold first
+SCORE_COLORS = [(70, "green"), (50, "orange"), (float("-inf"), "red")]
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """Create a pooled HTTP session that survives Streamlit reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = get_http_session()
+
+
+def parse_json(response):
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
+
+def error_detail(response):
+    """Return the API error detail, falling back to raw text for non-JSON bodies (e.g. proxy pages)"""
+    try:
+        body = parse_json(response)
+    except ValueError:
+        return response.text[:200]
+    if isinstance(body, dict):
+        return body.get("detail", response.text[:200])
+    return response.text[:200]
+
+
+def post_json(url, payload, **kwargs):
+    """POST a JSON payload serialized with orjson"""
+    kwargs.setdefault("timeout", _LLM_TIMEOUT)
+    return _SESSION.post(url, data=orjson.dumps(payload), headers={"Content-Type": "application/json"}, **kwargs)
+
+
+def post_json_gzip(url, payload, **kwargs):
+    """POST a JSON payload as a gzip-compressed body (text-heavy payloads shrink several-fold)"""
+    body = gzip.compress(orjson.dumps(payload), compresslevel=1)
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    kwargs.setdefault("timeout", _LLM_TIMEOUT)
+    return _SESSION.post(url, data=body, headers=headers, **kwargs)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_db_summary():
+    """Fetch the database summary, memoized across reruns"""
+    # Stream the (potentially large) summary straight into the decoder
+    with _SESSION.get(f"{API_BASE_URL}/database/summary", timeout=_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        return orjson.loads(response.raw.read(decode_content=True))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_all_job_descriptions():
+    """Fetch every job description without its text (the summary holds only the newest), memoized across reruns"""
+    response = _SESSION.get(
+        f"{API_BASE_URL}/database/job-descriptions",
+        params={"summary_only": True},
+        timeout=_TIMEOUT
+    )
+    response.raise_for_status()
+    return parse_json(response)['job_descriptions']
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_job_description_text(job_description_id):
+    """Fetch the text of one job description, memoized across reruns"""
+    response = _SESSION.get(f"{API_BASE_URL}/database/job-descriptions/{job_description_id}", timeout=_TIMEOUT)
+    response.raise_for_status()
+    return parse_json(response).get('job_description', '')
+
+
+# Short TTL (the backend caches for 5s) since matches are saved in the background,
+# so an early fetch may miss candidates that are still being written
+@st.cache_data(ttl=5, show_spinner=False)
+def get_candidates(job_description_id):
+    """Fetch the candidates of a job description, memoized across reruns"""
+    response = _SESSION.get(
+        f"{API_BASE_URL}/database/job-descriptions/{job_description_id}/candidates",
+        timeout=_TIMEOUT
+    )
+    response.raise_for_status()
+    return parse_json(response)['candidates']
+
 
 def main():
     st.title("🤖 Recruitment AI Agent")
@@ -81,397 +158,474 @@ def main():
         
         use_ai = st.checkbox("Use AI for Analysis", value=True)
     
+    ctx = ProviderContext(provider_code, api_key, use_ai)
+    
     # Main tabs
     tab1, tab2, tab3, tab4 = st.tabs(["📝 Job Description", "📄 Resume Matching", "📧 Email Generation", "🗄️ Database View"])
     
-    # Tab 1: Job Description
     with tab1:
-        st.header("Job Description Input")
+        render_tab_jd(ctx)
+    with tab2:
+        render_tab_match(ctx)
+    with tab3:
+        render_tab_email(ctx)
+    with tab4:
+        render_tab_db()
+
+
+def render_tab_jd(ctx):
+    """Render the job description input tab"""
+    st.header("Job Description Input")
+    
+    input_method = st.radio(
+        "Select Input Method",
+        ["Upload File", "Manual Input", "AI Generate"],
+        horizontal=True
+    )
+    
+    if input_method == "Upload File":
+        uploaded_file = st.file_uploader(
+            "Upload Job Description",
+            type=["pdf", "doc", "docx"],
+            help="Upload PDF or DOC/DOCX file"
+        )
         
-        input_method = st.radio(
-            "Select Input Method",
-            ["Upload File", "Manual Input", "AI Generate"],
-            horizontal=True
+        if uploaded_file and st.button("Extract Job Description"):
+            files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
+            try:
+                response = _SESSION.post(f"{API_BASE_URL}/job-description/upload", files=files, timeout=_TIMEOUT)
+                if response.status_code == 200:
+                    data = parse_json(response)
+                    st.session_state['job_description'] = data['job_description']
+                    st.session_state['job_description_id'] = data['metadata'].get('job_description_id')
+                    st.success("Job description extracted successfully!")
+                else:
+                    st.error(f"Error: {error_detail(response)}")
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+    
+    elif input_method == "Manual Input":
+        job_description_text = st.text_area(
+            "Enter Job Description",
+            height=300,
+            placeholder="Paste or type the job description here..."
         )
         
-        if input_method == "Upload File":
-            uploaded_file = st.file_uploader(
-                "Upload Job Description",
-                type=["pdf", "doc", "docx"],
-                help="Upload PDF or DOC/DOCX file"
-            )
-            
-            if uploaded_file and st.button("Extract Job Description"):
-                files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
+        if st.button("Save Job Description"):
+            if job_description_text:
                 try:
-                    response = requests.post(f"{API_BASE_URL}/job-description/upload", files=files)
+                    response = _SESSION.post(
+                        f"{API_BASE_URL}/job-description/input",
+                        params={"job_description": job_description_text},
+                        timeout=_TIMEOUT
+                    )
                     if response.status_code == 200:
-                        data = response.json()
+                        data = parse_json(response)
                         st.session_state['job_description'] = data['job_description']
                         st.session_state['job_description_id'] = data['metadata'].get('job_description_id')
-                        st.success("Job description extracted successfully!")
+                        st.success("Job description saved!")
                     else:
-                        st.error(f"Error: {response.json()['detail']}")
+                        st.error(f"Error: {error_detail(response)}")
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
+            else:
+                st.warning("Please enter a job description")
+    
+    else:  # AI Generate
+        st.subheader("Generate Job Description with AI")
         
-        elif input_method == "Manual Input":
-            job_description_text = st.text_area(
-                "Enter Job Description",
-                height=300,
-                placeholder="Paste or type the job description here..."
-            )
-            
-            if st.button("Save Job Description"):
-                if job_description_text:
-                    try:
-                        response = requests.post(
-                            f"{API_BASE_URL}/job-description/input",
-                            params={"job_description": job_description_text}
-                        )
-                        if response.status_code == 200:
-                            data = response.json()
-                            st.session_state['job_description'] = data['job_description']
-                            st.session_state['job_description_id'] = data['metadata'].get('job_description_id')
-                            st.success("Job description saved!")
-                        else:
-                            st.error(f"Error: {response.json()['detail']}")
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
-                else:
-                    st.warning("Please enter a job description")
+        col1, col2 = st.columns(2)
+        with col1:
+            job_title = st.text_input("Job Title", placeholder="e.g., Senior Python Developer")
+            years_of_exp = st.number_input("Years of Experience", min_value=0, max_value=20, value=5)
+            must_have_skills = st.text_input("Must-Have Skills", placeholder="Python, FastAPI, Docker")
         
-        else:  # AI Generate
-            st.subheader("Generate Job Description with AI")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                job_title = st.text_input("Job Title", placeholder="e.g., Senior Python Developer")
-                years_of_exp = st.number_input("Years of Experience", min_value=0, max_value=20, value=5)
-                must_have_skills = st.text_input("Must-Have Skills", placeholder="Python, FastAPI, Docker")
-            
-            with col2:
-                company_name = st.text_input("Company Name")
-                employment_type = st.selectbox(
-                    "Employment Type",
-                    ["Full-time", "Part-time", "Contract", "Internship", "Temporary"]
-                )
-                industry = st.text_input("Industry", placeholder="Technology")
-            
-            location = st.text_input("Location", placeholder="San Francisco, CA")
-            
-            if st.button("Generate Job Description", type="primary"):
-                with st.spinner("Generating..."):
-                    if job_title and must_have_skills:
-                        try:
-                            payload = {
-                                "job_title": job_title,
-                                "years_of_experience": years_of_exp,
-                                "must_have_skills": must_have_skills,
-                                "company_name": company_name,
-                                "employment_type": employment_type,
-                                "industry": industry,
-                                "location": location
-                            }
-                            
-                            params = {"provider": provider_code}
-                            if api_key:
-                                params["api_key"] = api_key
-                            
-                            response = requests.post(
-                                f"{API_BASE_URL}/job-description/generate",
-                                json=payload,
-                                params=params
-                            )
-                            
-                            if response.status_code == 200:
-                                data = response.json()
-                                st.session_state['job_description'] = data['job_description']
-                                st.session_state['job_description_id'] = data['metadata'].get('job_description_id')
-                                st.success("Job description generated!")
-                                
-                                # Show generated JD
-                                with st.expander("Generated Job Description"):
-                                    st.markdown(data['job_description'])
-                            else:
-                                st.error(f"Error: {response.json()['detail']}")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
-                    else:
-                        st.warning("Please fill in all required fields")
+        with col2:
+            company_name = st.text_input("Company Name")
+            employment_type = st.selectbox(
+                "Employment Type",
+                ["Full-time", "Part-time", "Contract", "Internship", "Temporary"]
+            )
+            industry = st.text_input("Industry", placeholder="Technology")
         
-        # Display current job description
-        if 'job_description' in st.session_state:
-            st.divider()
-            st.subheader("Current Job Description")
-            st.text_area("", st.session_state['job_description'], height=200, disabled=True)
-    
-    # Tab 2: Resume Matching
-    with tab2:
-        st.header("Resume Matching")
+        location = st.text_input("Location", placeholder="San Francisco, CA")
         
-        if 'job_description' not in st.session_state:
-            st.warning("Please input a job description first!")
-        else:
-            # Upload resumes
-            uploaded_resumes = st.file_uploader(
-                "Upload Resumes (PDF or DOCX)",
-                type=["pdf", "doc", "docx"],
-                accept_multiple_files=True,
-                help="Upload up to 10 resumes"
-            )
-            
-            if len(uploaded_resumes) > 10:
-                st.error("Maximum 10 resumes allowed!")
-                uploaded_resumes = uploaded_resumes[:10]
-            
-            if uploaded_resumes and st.button("Match Resumes", type="primary"):
-                with st.spinner("Analyzing resumes..."):
-                    resume_texts = []
-                    resume_filenames = []
-                    
-                    # Extract text from resumes locally
-                    for resume in uploaded_resumes:
-                        text = extract_text_from_upload(resume)
-                        resume_texts.append(text)
-                        resume_filenames.append(resume.name)
-                        
-                        if not text:
-                            st.warning(f"Could not extract text from {resume.name}")
-                    
-                    # Call matching API
+        if st.button("Generate Job Description", type="primary"):
+            with st.spinner("Generating..."):
+                if job_title and must_have_skills:
                     try:
                         payload = {
-                            "job_description": st.session_state['job_description'],
-                            "job_description_id": st.session_state.get('job_description_id'),
-                            "resume_texts": resume_texts,
-                            "resume_filenames": resume_filenames
+                            "job_title": job_title,
+                            "years_of_experience": years_of_exp,
+                            "must_have_skills": must_have_skills,
+                            "company_name": company_name,
+                            "employment_type": employment_type,
+                            "industry": industry,
+                            "location": location
                         }
                         
-                        params = {"provider": provider_code, "use_ai": use_ai}
-                        if api_key:
-                            params["api_key"] = api_key
+                        params = {"provider": ctx.provider_code}
+                        if ctx.api_key:
+                            params["api_key"] = ctx.api_key
                         
-                        response = requests.post(
-                            f"{API_BASE_URL}/resume-matching/match",
-                            json=payload,
+                        response = post_json(
+                            f"{API_BASE_URL}/job-description/generate",
+                            payload,
                             params=params
                         )
                         
                         if response.status_code == 200:
-                            data = response.json()
-                            st.session_state['matching_results'] = data
-                            st.success("Matching completed! Scroll down to view results.")
+                            data = parse_json(response)
+                            st.session_state['job_description'] = data['job_description']
+                            st.session_state['job_description_id'] = data['metadata'].get('job_description_id')
+                            st.success("Job description generated!")
+                            
+                            # Show generated JD
+                            with st.expander("Generated Job Description"):
+                                st.markdown(data['job_description'])
                         else:
-                            st.error(f"Error: {response.json()['detail']}")
+                            st.error(f"Error: {error_detail(response)}")
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
-            
-            # Display previous results if available
-            if 'matching_results' in st.session_state:
-                display_results(st.session_state['matching_results'])
+                else:
+                    st.warning("Please fill in all required fields")
     
-    # Tab 3: Email Generation
-    with tab3:
-        st.header("Email Generation")
+    # Display current job description
+    if 'job_description' in st.session_state:
+        st.divider()
+        st.subheader("Current Job Description")
+        st.text_area("", st.session_state['job_description'], height=200, disabled=True)
+
+
+def render_tab_match(ctx):
+    """Render the resume matching tab"""
+    st.header("Resume Matching")
+    
+    if 'job_description' not in st.session_state:
+        st.warning("Please input a job description first!")
+    else:
+        # Upload resumes
+        uploaded_resumes = st.file_uploader(
+            "Upload Resumes (PDF or DOCX)",
+            type=["pdf", "doc", "docx"],
+            accept_multiple_files=True,
+            help="Upload up to 10 resumes"
+        )
         
-        if 'matching_results' not in st.session_state:
-            st.info("Please match resumes first to generate emails")
-        else:
-            candidates = st.session_state['matching_results']['results']
-            
-            col1, col2 = st.columns([1, 1])
-            
-            with col1:
-                st.subheader("🎯 Personalized Interview Email (Best Match)")
-                if candidates:
-                    best_candidate = candidates[0]  # Already sorted by score
-                    
-                    st.info(f"**Top Candidate:** {best_candidate['filename']} (Score: {best_candidate['score']}%)")
-                    
-                    candidate_name = st.text_input("Candidate Name", value="John Doe")
-                    candidate_email = st.text_input("Candidate Email", value="john.doe@example.com")
-                    company_name_email = st.text_input("Company Name", value="Tech Corp")
-                    manager_name = st.text_input("Hiring Manager Name", value="Sarah Johnson")
-                    
-                    if st.button("Generate Personalized Interview Email", type="primary"):
-                        generate_and_show_email(    
-                            best_candidate,
-                            candidate_name,
-                            candidate_email,
-                            company_name_email,
-                            manager_name,
-                            "interview",
-                            provider_code,
-                            api_key
-                        )
-            
-            with col2:
-                selected_candidate_idx = st.selectbox(
-                    "Select Candidate",
-                    range(len(candidates)),
-                    format_func=lambda x: f"{candidates[x]['filename']} (Score: {candidates[x]['score']}%)"
-                )
-                
-                if selected_candidate_idx > 0:  # Skip the best match
-                    st.subheader("Personalized Rejection Email (Other Candidates)")
-                    candidate = candidates[selected_candidate_idx]
+        if len(uploaded_resumes) > 10:
+            st.error("Maximum 10 resumes allowed!")
+            uploaded_resumes = uploaded_resumes[:10]
+        
+        enable_ocr = st.checkbox(
+            "Enable OCR for scanned PDFs",
+            value=False,
+            help="Slower; runs OCR on PDFs that have no text layer"
+        )
+        
+        if uploaded_resumes and st.button("Match Resumes", type="primary"):
+            with st.spinner("Analyzing resumes..."):
+                # Upload the resume files; the backend extracts their text
+                try:
+                    files = [
+                        ("resumes", (resume.name, resume.getvalue(), resume.type))
+                        for resume in uploaded_resumes
+                    ]
+                    form_data = {"job_description": st.session_state['job_description']}
+                    if st.session_state.get('job_description_id'):
+                        form_data["job_description_id"] = st.session_state['job_description_id']
                     
-                    st.info(f"**Selected Candidate:** {candidate['filename']} (Score: {candidate['score']}%)")
+                    params = {"provider": ctx.provider_code, "use_ai": ctx.use_ai}
+                    if ctx.api_key:
+                        params["api_key"] = ctx.api_key
+                    if enable_ocr:
+                        params["ocr"] = True
                     
-                    candidate_name = st.text_input("Candidate Name", value="Jane Smith", key="rejection")
-                    candidate_email = st.text_input("Candidate Email", value="jane.smith@example.com", key="rejection_email")
-                    company_name_email = st.text_input("Company Name", value="Tech Corp", key="rejection_company")
-                    manager_name = st.text_input("Hiring Manager Name", value="Sarah Johnson", key="rejection_manager")
+                    response = _SESSION.post(
+                        f"{API_BASE_URL}/resume-matching/match-files",
+                        files=files,
+                        data=form_data,
+                        params=params,
+                        timeout=_LLM_TIMEOUT
+                    )
                     
-                    if st.button("Generate Personalized Rejection Email", type="primary"):
-                        generate_and_show_email(
-                            candidate,
-                            candidate_name,
-                            candidate_email,
-                            company_name_email,
-                            manager_name,
-                            "rejection",
-                            provider_code,
-                            api_key
-                        )
+                    if response.status_code == 200:
+                        data = parse_json(response)
+                        st.session_state['matching_results'] = data
+                        # New candidates and sessions were saved: drop memoized database views
+                        get_db_summary.clear()
+                        get_candidates.clear()
+                        get_all_job_descriptions.clear()
+                        for filename in data.get('skipped_files', []):
+                            st.warning(f"{filename}: no extractable text (likely scanned), skipped")
+                        st.success("Matching completed! Scroll down to view results.")
+                    else:
+                        st.error(f"Error: {error_detail(response)}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+        
+        # Display previous results if available
+        if 'matching_results' in st.session_state:
+            display_results(st.session_state['matching_results'])
+
+
+def render_tab_email(ctx):
+    """Render the email generation tab"""
+    st.header("Email Generation")
     
-    # Tab 4: Database View
-    with tab4:
-        st.header("🗄️ Database View")
-        st.markdown("View stored job descriptions and candidate data from MongoDB")
+    if 'matching_results' not in st.session_state:
+        st.info("Please match resumes first to generate emails")
+    else:
+        candidates = st.session_state['matching_results']['results']
         
-        # Database summary
-        if st.button("🔄 Refresh Database Data", type="primary"):
-            try:
-                response = requests.get(f"{API_BASE_URL}/database/summary")
-                if response.status_code == 200:
-                    st.session_state['db_summary'] = response.json()
-                    st.success("Database data refreshed!")
-                else:
-                    st.error(f"Error: {response.json()['detail']}")
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        col1, col2 = st.columns([1, 1])
         
-        # Display database summary if available
-        if 'db_summary' in st.session_state:
-            summary = st.session_state['db_summary']
-            
-            # Summary metrics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Job Descriptions", summary.get('total_job_descriptions', 0))
-            with col2:
-                st.metric("Total Candidates", summary.get('total_candidates', 0))
-            with col3:
-                st.metric("Total Sessions", summary.get('total_sessions', 0))
+        with col1:
+            st.subheader("🎯 Personalized Interview Email (Best Match)")
+            if candidates:
+                best_candidate = candidates[0]  # Already sorted by score
+                
+                st.info(f"**Top Candidate:** {best_candidate['filename']} (Score: {best_candidate['score']}%)")
+                
+                candidate_name = st.text_input("Candidate Name", value="John Doe")
+                candidate_email = st.text_input("Candidate Email", value="john.doe@example.com")
+                company_name_email = st.text_input("Company Name", value="Tech Corp")
+                manager_name = st.text_input("Hiring Manager Name", value="Sarah Johnson")
+                
+                if st.button("Generate Personalized Interview Email", type="primary"):
+                    generate_and_show_email(    
+                        best_candidate,
+                        candidate_name,
+                        candidate_email,
+                        company_name_email,
+                        manager_name,
+                        "interview",
+                        ctx.provider_code,
+                        ctx.api_key
+                    )
+        
+        with col2:
+            candidate_labels = [f"{c['filename']} (Score: {c['score']}%)" for c in candidates]
+            selected_candidate_idx = st.selectbox(
+                "Select Candidate",
+                range(len(candidates)),
+                format_func=candidate_labels.__getitem__
+            )
             
+            if selected_candidate_idx > 0:  # Skip the best match
+                st.subheader("Personalized Rejection Email (Other Candidates)")
+                candidate = candidates[selected_candidate_idx]
+                
+                st.info(f"**Selected Candidate:** {candidate['filename']} (Score: {candidate['score']}%)")
+                
+                candidate_name = st.text_input("Candidate Name", value="Jane Smith", key="rejection")
+                candidate_email = st.text_input("Candidate Email", value="jane.smith@example.com", key="rejection_email")
+                company_name_email = st.text_input("Company Name", value="Tech Corp", key="rejection_company")
+                manager_name = st.text_input("Hiring Manager Name", value="Sarah Johnson", key="rejection_manager")
+                
+                if st.button("Generate Personalized Rejection Email", type="primary"):
+                    generate_and_show_email(
+                        candidate,
+                        candidate_name,
+                        candidate_email,
+                        company_name_email,
+                        manager_name,
+                        "rejection",
+                        ctx.provider_code,
+                        ctx.api_key
+                    )
+        
+        # Bulk generation: one concurrent request per candidate
+        if candidates:
             st.divider()
+            st.subheader("📨 Generate Emails for Top Candidates")
+            st.caption("Interview email for the best match, rejection emails for the others")
+            
+            top_k = st.number_input(
+                "Number of Top Candidates",
+                min_value=1,
+                max_value=len(candidates),
+                value=len(candidates)
+            )
+            bulk_company = st.text_input("Company Name", value="Tech Corp", key="bulk_company")
+            bulk_manager = st.text_input("Hiring Manager Name", value="Sarah Johnson", key="bulk_manager")
             
-            # Job Descriptions section
-            st.subheader("📝 Job Descriptions")
-            job_descriptions = summary.get('job_descriptions', [])
+            if st.button("Generate All Emails", type="primary"):
+                with st.spinner("Generating emails..."):
+                    generate_and_show_emails_bulk(
+                        candidates[:int(top_k)],
+                        bulk_company,
+                        bulk_manager,
+                        ctx.provider_code,
+                        ctx.api_key
+                    )
+
+
+def render_tab_db():
+    """Render the database view tab"""
+    st.header("🗄️ Database View")
+    st.markdown("View stored job descriptions and candidate data from MongoDB")
+    
+    # Database summary
+    if st.button("🔄 Refresh Database Data", type="primary"):
+        # Explicit refresh: drop memoized responses so fresh data is fetched
+        get_db_summary.clear()
+        get_candidates.clear()
+        get_all_job_descriptions.clear()
+        st.session_state.pop('all_job_descriptions', None)
+        try:
+            st.session_state['db_summary'] = get_db_summary()
+            st.success("Database data refreshed!")
+        except requests.HTTPError as e:
+            st.error(f"Error: {error_detail(e.response)}")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+    
+    # Display database summary if available
+    if 'db_summary' in st.session_state:
+        summary = st.session_state['db_summary']
+        
+        # Summary metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Job Descriptions", summary.get('total_job_descriptions', 0))
+        with col2:
+            st.metric("Total Candidates", summary.get('total_candidates', 0))
+        with col3:
+            st.metric("Total Sessions", summary.get('total_sessions', 0))
+        
+        st.divider()
+        
+        # Job Descriptions section
+        st.subheader("📝 Job Descriptions")
+        job_descriptions = st.session_state.get('all_job_descriptions') or summary.get('job_descriptions', [])
+        
+        # The summary lists only the newest job descriptions; older ones come from the full listing
+        total_jds = summary.get('total_job_descriptions', 0)
+        if len(job_descriptions) < total_jds:
+            st.caption(f"Showing the newest {len(job_descriptions)} of {total_jds} job descriptions")
+            if st.button(f"Load all {total_jds} job descriptions", key="load_all_jds"):
+                try:
+                    job_descriptions = st.session_state['all_job_descriptions'] = get_all_job_descriptions()
+                except requests.HTTPError as e:
+                    st.error(f"Error: {error_detail(e.response)}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+        
+        if job_descriptions:
+            # All expand/load/details bookkeeping lives in one dict instead of per-row keys
+            ui = st.session_state.setdefault(
+                "ui", {"expanded_jds": set(), "expanded_details": set(), "loaded_candidates": {}}
+            )
             
-            if job_descriptions:
-                for i, jd in enumerate(job_descriptions):
-                    # Use session state to control expander state
-                    expander_state_key = f"jd_expanded_{i}"
-                    is_expanded = st.session_state.get(expander_state_key, False)
+            for i, jd in enumerate(job_descriptions):
+                key = f"jd_{i}"
+                jd_id = jd["_id"]
+                
+                # Create expandable section using checkbox
+                col_header, col_toggle = st.columns([4, 1])
+                with col_header:
+                    st.subheader(f"# {i+1} - {jd.get('source', 'Unknown')} ({jd.get('created_at', '')[:10]})")
+                with col_toggle:
+                    is_expanded = st.checkbox("Expand", value=i in ui["expanded_jds"], key=f"{key}_expand")
+                if is_expanded:
+                    ui["expanded_jds"].add(i)
+                else:
+                    ui["expanded_jds"].discard(i)
+                
+                if is_expanded:
+                    col1, col2 = st.columns([2, 1])
                     
-                    # Create expandable section using checkbox
-                    col_header, col_toggle = st.columns([4, 1])
-                    with col_header:
-                        st.subheader(f"# {i+1} - {jd.get('source', 'Unknown')} ({jd.get('created_at', '')[:10]})")
-                    with col_toggle:
-                        is_expanded = st.checkbox("Expand", value=is_expanded, key=f"expand_{i}")
-                        st.session_state[expander_state_key] = is_expanded
+                    with col1:
+                        st.write("**Job Description:**")
+                        # The full listing leaves out the text, so it is fetched on expand
+                        jd_text = jd.get('job_description')
+                        if jd_text is None:
+                            try:
+                                jd_text = get_job_description_text(jd_id)
+                            except Exception as e:
+                                jd_text = ""
+                                st.error(f"Error: {str(e)}")
+                        st.text_area("", jd_text, height=150, disabled=True, key=f"{key}_text")
                     
-                    if is_expanded:
-                        col1, col2 = st.columns([2, 1])
-                        
-                        with col1:
-                            st.write("**Job Description:**")
-                            st.text_area("", jd.get('job_description', ''), height=150, disabled=True, key=f"jd_text_{i}")
+                    with col2:
+                        st.write("**Metadata:**")
+                        st.json({
+                            "ID": jd.get('_id', ''),
+                            "Source": jd.get('source', ''),
+                            "Filename": jd.get('filename', 'N/A'),
+                            "Created": jd.get('created_at', '')[:19] if jd.get('created_at') else 'N/A'
+                        })
                         
-                        with col2:
-                            st.write("**Metadata:**")
-                            st.json({
-                                "ID": jd.get('_id', ''),
-                                "Source": jd.get('source', ''),
-                                "Filename": jd.get('filename', 'N/A'),
-                                "Created": jd.get('created_at', '')[:19] if jd.get('created_at') else 'N/A'
-                            })
-                            
-                            # Button to view candidates for this job description
-                            candidates_loaded = f'candidates_{jd["_id"]}' in st.session_state
-                            
-                            if not candidates_loaded:
-                                if st.button(f"View Candidates", key=f"view_candidates_{i}"):
-                                    try:
-                                        response = requests.get(f"{API_BASE_URL}/database/job-descriptions/{jd['_id']}/candidates")
-                                        if response.status_code == 200:
-                                            st.session_state[f'candidates_{jd["_id"]}'] = response.json()['candidates']
-                                            st.success("Candidates loaded!")
-                                        else:
-                                            st.error(f"Error: {response.json()['detail']}")
-                                    except Exception as e:
-                                        st.error(f"Error: {str(e)}")
-                            else:
-                                if st.button(f"Close Candidates", key=f"close_candidates_{i}"):
-                                    del st.session_state[f'candidates_{jd["_id"]}']
-                                    st.success("Candidates list closed!")
+                        # Button to view candidates for this job description
+                        if jd_id not in ui["loaded_candidates"]:
+                            if st.button(f"View Candidates", key=f"{key}_view_candidates"):
+                                try:
+                                    ui["loaded_candidates"][jd_id] = get_candidates(jd_id)
+                                    st.success("Candidates loaded!")
+                                except requests.HTTPError as e:
+                                    st.error(f"Error: {error_detail(e.response)}")
+                                except Exception as e:
+                                    st.error(f"Error: {str(e)}")
+                        else:
+                            if st.button(f"Close Candidates", key=f"{key}_close_candidates"):
+                                del ui["loaded_candidates"][jd_id]
+                                st.success("Candidates list closed!")
+                    
+                    # Display candidates if loaded
+                    if jd_id in ui["loaded_candidates"]:
+                        candidates = ui["loaded_candidates"][jd_id]
+                        st.write("**Candidates for this Job Description:**")
                         
-                        # Display candidates if loaded
-                        if f'candidates_{jd["_id"]}' in st.session_state:
-                            candidates = st.session_state[f'candidates_{jd["_id"]}']
-                            st.write("**Candidates for this Job Description:**")
-                            
-                            for j, candidate in enumerate(candidates):
-                                with st.container():
-                                    col1, col2, col3 = st.columns([2, 1, 1])
-                                    
+                        for j, candidate in enumerate(candidates):
+                            details_key = (i, j)
+                            with st.container():
+                                col1, col2, col3 = st.columns([2, 1, 1])
+                                
+                                with col1:
+                                    st.write(f"**{candidate.get('name', 'Unknown')}** ({candidate.get('filename', '')})")
+                                    st.write(f"Email: {candidate.get('email', 'N/A')}")
+                                    if candidate.get('phone'):
+                                        st.write(f"Phone: {candidate.get('phone')}")
+                                
+                                with col2:
+                                    st.metric("Score", f"{candidate.get('matching_score', 0):.1f}%")
+                                
+                                with col3:
+                                    st.button(
+                                        "Details",
+                                        key=f"{key}_details_{j}",
+                                        on_click=ui["expanded_details"].add,
+                                        args=(details_key,)
+                                    )
+                                
+                                # Show candidate details if requested
+                                if details_key in ui["expanded_details"]:
+                                    col1, col2 = st.columns(2)
                                     with col1:
-                                        st.write(f"**{candidate.get('name', 'Unknown')}** ({candidate.get('filename', '')})")
-                                        st.write(f"Email: {candidate.get('email', 'N/A')}")
-                                        if candidate.get('phone'):
-                                            st.write(f"Phone: {candidate.get('phone')}")
+                                        st.write("**Matching Skills:**")
+                                        for skill in candidate.get('matching_skills', [])[:5]:
+                                            st.write(f"✅ {skill}")
                                     
                                     with col2:
-                                        st.metric("Score", f"{candidate.get('matching_score', 0):.1f}%")
+                                        st.write("**Missing Skills:**")
+                                        for skill in candidate.get('missing_skills', [])[:5]:
+                                            st.write(f"❌ {skill}")
                                     
-                                    with col3:
-                                        # Use a different approach for showing details
-                                        show_details_key = f"show_details_{i}_{j}"
-                                        if st.button("Details", key=f"candidate_details_{i}_{j}"):
-                                            st.session_state[show_details_key] = True
+                                    st.write("**Remarks:**")
+                                    st.write(candidate.get('remarks', 'No remarks available'))
                                     
-                                    # Show candidate details if requested
-                                    show_details = st.session_state.get(f"show_details_{i}_{j}", False)
-                                    if show_details:
-                                        candidate_data = candidate
-                                        
-                                        col1, col2 = st.columns(2)
-                                        with col1:
-                                            st.write("**Matching Skills:**")
-                                            for skill in candidate_data.get('matching_skills', [])[:5]:
-                                                st.write(f"✅ {skill}")
-                                        
-                                        with col2:
-                                            st.write("**Missing Skills:**")
-                                            for skill in candidate_data.get('missing_skills', [])[:5]:
-                                                st.write(f"❌ {skill}")
-                                        
-                                        st.write("**Remarks:**")
-                                        st.write(candidate_data.get('remarks', 'No remarks available'))
-                                        
-                                        # Clear details button
-                                        if st.button("Close Details", key=f"close_details_{i}_{j}"):
-                                            st.session_state[f"show_details_{i}_{j}"] = False                        
-                        st.divider()  # Add divider after each job description
-            else:
-                st.info("No job descriptions found in database")
+                                    # Clear details button
+                                    st.button(
+                                        "Close Details",
+                                        key=f"{key}_close_details_{j}",
+                                        on_click=ui["expanded_details"].discard,
+                                        args=(details_key,)
+                                    )
+                    st.divider()  # Add divider after each job description
         else:
-            st.info("Click 'Refresh Database Data' to load information from MongoDB")
+            st.info("No job descriptions found in database")
+    else:
+        st.info("Click 'Refresh Database Data' to load information from MongoDB")
 
 
 def display_results(data):
@@ -492,115 +646,187 @@ def display_results(data):
         if best_match:
             st.metric("Selected", best_match['filename'])
     
-    # Results table
+    # Results table: one dataframe instead of a widget block per candidate
     if results:
-        # Highlight best match
-        for idx, result in enumerate(results):
-            is_best = idx == 0 and result['score'] >= 70
+        if results[0]['score'] >= 70:
+            st.success(f"🏆 **{results[0]['filename']}** - Score: **{results[0]['score']:.1f}%**")
+        
+        df = pd.DataFrame([
+            {
+                "File": r['filename'],
+                "Score": r['score'],
+                "Matching Skills": ", ".join(r.get('matching_skills', [])[:5]),
+                "Missing Skills": ", ".join(r.get('missing_skills', [])[:5]),
+                "Remarks": r['remarks']
+            }
+            for r in results
+        ])
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Score": st.column_config.ProgressColumn("Score", format="%.1f%%", min_value=0, max_value=100)
+            }
+        )
+        
+        # Full details only for the candidate being inspected
+        inspect_idx = st.selectbox(
+            "Inspect candidate",
+            range(len(results)),
+            format_func=lambda i: f"{results[i]['filename']} ({results[i]['score']:.1f}%)",
+            key="inspect_candidate"
+        )
+        result = results[inspect_idx]
+        with st.expander("View Details", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**Matching Skills:**")
+                if result.get('matching_skills'):
+                    st.write("\n".join(f"- ✅ {skill}" for skill in result['matching_skills']))
+                else:
+                    st.info("No matching skills identified")
             
-            with st.container():
-                if is_best:
-                    st.success(f"🏆 **{result['filename']}** - Score: **{result['score']:.1f}%**")
+            with col2:
+                st.write("**Missing Skills:**")
+                if result.get('missing_skills'):
+                    st.write("\n".join(f"- ❌ {skill}" for skill in result['missing_skills']))
                 else:
-                    st.write(f"**{result['filename']}** - Score: {result['score']:.1f}%")
+                    st.success("All required skills present!")
+            
+            st.write("**Remarks:**")
+            st.write(result['remarks'])
+
+
+def build_email_request(candidate, name, email, company, manager, email_type, provider, api_key=None):
+    """Build payload and query params for the email generation endpoint"""
+    # Use the new enhanced endpoint with resume matching data
+    params = {
+        "provider": provider
+    }
+    
+    if api_key:
+        params["api_key"] = api_key
+    
+    # Include resume matching data for personalization
+    matching_result = {
+        "score": candidate['score'],
+        "matching_skills": candidate.get('matching_skills', []),
+        "missing_skills": candidate.get('missing_skills', []),
+        "remarks": candidate.get('remarks', ''),
+        "resume_info": candidate.get('resume_info', {})  # Include extracted resume information
+    }
+    
+    payload = {
+        "candidate_name": name,
+        "candidate_email": email,
+        "job_description": st.session_state['job_description'],
+        "email_type": email_type,
+        "company_name": company,
+        "hiring_manager_name": manager,
+        "matching_result": matching_result
+    }
+    return payload, params
+
+
+def show_email_response(response, candidate, email_type, key=None):
+    """Display a generated email; key keeps widgets unique when several emails are shown"""
+    if response.status_code == 200:
+        data = parse_json(response)
+        
+        st.success("🎉 Personalized email generated!")
+        
+        # Display email subject and body
+        st.text_input("📧 Subject", value=data['email_subject'], disabled=True, key=key and f"{key}_subject")
+        st.text_area("📝 Email Body", value=data['email_body'], height=300, key=key and f"{key}_body")
+        
+        # Display personalized insights used
+        if data.get('personalized_insights'):
+            with st.expander("🎯 Personalized Insights Used", expanded=False):
+                st.markdown("**Resume Matching Analysis:**")
+                st.text(data['personalized_insights'])
                 
-                # Show details
-                with st.expander("View Details"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write("**Matching Skills:**")
-                        if result.get('matching_skills'):
-                            for skill in result['matching_skills'][:5]:  # Show first 5
-                                st.write(f"✅ {skill}")
-                        else:
-                            st.info("No matching skills identified")
-                    
-                    with col2:
-                        st.write("**Missing Skills:**")
-                        if result.get('missing_skills'):
-                            for skill in result['missing_skills'][:5]:  # Show first 5
-                                st.write(f"❌ {skill}")
-                        else:
-                            st.success("All required skills present!")
-                    
-                    st.write("**Remarks:**")
-                    st.write(result['remarks'])
+                # Show matching skills breakdown
+                if candidate.get('matching_skills'):
+                    st.markdown("**✅ Matching Skills:**")
+                    for skill in candidate['matching_skills'][:5]:
+                        st.write(f"• {skill}")
                 
-                st.divider()
+                if candidate.get('missing_skills') and email_type == "rejection":
+                    st.markdown("**⚠️ Areas for Growth:**")
+                    for skill in candidate['missing_skills'][:3]:
+                        st.write(f"• {skill}")
+        
+        # Show candidate score prominently
+        score_color = next(color for threshold, color in SCORE_COLORS if candidate['score'] >= threshold)
+        st.markdown(f"**📊 Candidate Score: <span style='color: {score_color}'>{candidate['score']}%</span>**", unsafe_allow_html=True)
+        
+    else:
+        st.error(f"❌ Error: {error_detail(response)}")
 
 
 def generate_and_show_email(candidate, name, email, company, manager, email_type, provider, api_key=None):
     """Generate and display personalized email with resume matching insights"""
     try:
-        # Use the new enhanced endpoint with resume matching data
-        params = {
-            "provider": provider
-        }
-        
-        if api_key:
-            params["api_key"] = api_key
-        
-        # Include resume matching data for personalization
-        matching_result = {
-            "score": candidate['score'],
-            "matching_skills": candidate.get('matching_skills', []),
-            "missing_skills": candidate.get('missing_skills', []),
-            "remarks": candidate.get('remarks', ''),
-            "resume_info": candidate.get('resume_info', {})  # Include extracted resume information
-        }
-        
-        payload = {
-            "candidate_name": name,
-            "candidate_email": email,
-            "job_description": st.session_state['job_description'],
-            "email_type": email_type,
-            "company_name": company,
-            "hiring_manager_name": manager,
-            "matching_result": matching_result
-        }
+        payload, params = build_email_request(candidate, name, email, company, manager, email_type, provider, api_key)
         
-        response = requests.post(
+        response = post_json_gzip(
             f"{API_BASE_URL}/email/generate-with-matching",
-            json=payload,
+            payload,
             params=params
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            st.success("🎉 Personalized email generated!")
-            
-            # Display email subject and body
-            st.text_input("📧 Subject", value=data['email_subject'], disabled=True)
-            st.text_area("📝 Email Body", value=data['email_body'], height=300)
-            
-            # Display personalized insights used
-            if data.get('personalized_insights'):
-                with st.expander("🎯 Personalized Insights Used", expanded=False):
-                    st.markdown("**Resume Matching Analysis:**")
-                    st.text(data['personalized_insights'])
-                    
-                    # Show matching skills breakdown
-                    if candidate.get('matching_skills'):
-                        st.markdown("**✅ Matching Skills:**")
-                        for skill in candidate['matching_skills'][:5]:
-                            st.write(f"• {skill}")
-                    
-                    if candidate.get('missing_skills') and email_type == "rejection":
-                        st.markdown("**⚠️ Areas for Growth:**")
-                        for skill in candidate['missing_skills'][:3]:
-                            st.write(f"• {skill}")
-            
-            # Show candidate score prominently
-            score_color = "green" if candidate['score'] >= 70 else "orange" if candidate['score'] >= 50 else "red"
-            st.markdown(f"**📊 Candidate Score: <span style='color: {score_color}'>{candidate['score']}%</span>**", unsafe_allow_html=True)
-            
-        else:
-            st.error(f"❌ Error: {response.json()['detail']}")
+        show_email_response(response, candidate, email_type)
     except Exception as e:
         st.error(f"❌ Error: {str(e)}")
 
 
+def _post_emails_parallel(email_requests):
+    """POST several (payload, params) email requests concurrently over the pooled session"""
+    url = f"{API_BASE_URL}/email/generate-with-matching"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(post_json_gzip, url, payload, params=params)
+            for payload, params in email_requests
+        ]
+    
+    # Keep request order; a failed request yields its exception instead of a response
+    responses = []
+    for future in futures:
+        try:
+            responses.append(future.result())
+        except Exception as e:
+            responses.append(e)
+    return responses
+
+
+def generate_and_show_emails_bulk(candidates, company, manager, provider, api_key=None):
+    """Generate emails for several candidates at once: interview for the best match, rejection for the rest"""
+    email_requests = []
+    email_types = []
+    for idx, candidate in enumerate(candidates):
+        # Candidates are sorted by score, so the first one is the best match
+        email_type = "interview" if idx == 0 else "rejection"
+        name = candidate['filename'].split('.')[0].replace('_', ' ').title()
+        email = f"{name.lower().replace(' ', '.')}@example.com"
+        email_requests.append(
+            build_email_request(candidate, name, email, company, manager, email_type, provider, api_key)
+        )
+        email_types.append(email_type)
+    
+    responses = _post_emails_parallel(email_requests)
+    
+    for idx, (candidate, email_type, response) in enumerate(zip(candidates, email_types, responses)):
+        st.markdown(f"#### {candidate['filename']} ({email_type.title()})")
+        if isinstance(response, Exception):
+            st.error(f"❌ Error: {str(response)}")
+        else:
+            try:
+                show_email_response(response, candidate, email_type, key=f"bulk_email_{idx}")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+        st.divider()
+
+
 if __name__ == "__main__":
     main()
 
@@ -1,22 +1,43 @@
 """
 Main FastAPI application for Recruitment AI Agent
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.utilities.logger import setup_logger
+from app.utilities.middleware import GZipRequestMiddleware
+from app.utilities.json_utils import MongoJSONResponse
+from app.services.database_service import get_mongodb_service
+from app.services.document_processor import shutdown_executor
 
 # Import routers
 from app.routers import job_description, resume_matching, email_generation, database
 
 logger = setup_logger()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared MongoDB pool on startup; flush background writes, close it and stop extraction workers on shutdown"""
+    mongodb_service = get_mongodb_service()
+    await mongodb_service.connect()
+    await mongodb_service.ensure_indexes()
+    yield
+    await mongodb_service.drain_pending_writes()
+    await mongodb_service.close()
+    shutdown_executor()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Recruitment AI Agent API",
     description="AI-powered recruitment system for matching candidates with job descriptions",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=MongoJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,6 +49,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Accept gzip-compressed request bodies (Content-Encoding: gzip)
+app.add_middleware(GZipRequestMiddleware)
+
+# Compress large responses (e.g. /database/summary) for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Include routers
 app.include_router(job_description.router, prefix="/api/v1", tags=["Job Description"])
 app.include_router(resume_matching.router, prefix="/api/v1", tags=["Resume Matching"])
@@ -1,12 +1,35 @@
 """
 MongoDB models for storing job descriptions and candidate data
 """
-from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Annotated, List, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field
 from bson import ObjectId
 
 
+def utc_now() -> datetime:
+    """Current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
+
+
+_HEX24_RE = re.compile(r'[0-9a-fA-F]{24}')
+
+
+@lru_cache(maxsize=1024)
+def to_object_id(value: str) -> ObjectId:
+    """Convert an id string to ObjectId, memoized since the same ids recur across requests"""
+    if _HEX24_RE.fullmatch(value) or ObjectId.is_valid(value):
+        return ObjectId(value)
+    raise ValueError("Invalid ObjectId")
+
+
+def as_object_id(value: Union[str, ObjectId]) -> ObjectId:
+    """Return value as an ObjectId, parsing only when given a string"""
+    return value if isinstance(value, ObjectId) else to_object_id(value)
+
+
 class PyObjectId(ObjectId):
     """Custom ObjectId type for Pydantic v2"""
     @classmethod
@@ -19,8 +42,7 @@ class PyObjectId(ObjectId):
         if isinstance(v, ObjectId):
             return v
         if isinstance(v, str):
-            if ObjectId.is_valid(v):
-                return ObjectId(v)
+            return to_object_id(v)
         raise ValueError("Invalid ObjectId")
 
     @classmethod
@@ -29,20 +51,54 @@ class PyObjectId(ObjectId):
         return field_schema
 
 
+class UploadMetadata(BaseModel):
+    """Metadata of an uploaded job description file"""
+    model_config = ConfigDict(extra="ignore")
+
+    source: Literal["upload"] = "upload"
+    file_size: Optional[int] = None
+
+
+class ManualInputMetadata(BaseModel):
+    """Metadata of a manually entered job description"""
+    model_config = ConfigDict(extra="ignore")
+
+    source: Literal["manual_input"] = "manual_input"
+
+
+class AIGeneratedMetadata(BaseModel):
+    """Generation parameters of an AI-generated job description"""
+    model_config = ConfigDict(extra="ignore")
+
+    source: Literal["ai_generated"] = "ai_generated"
+    job_title: Optional[str] = None
+    industry: Optional[str] = None
+    location: Optional[str] = None
+    years_of_experience: Optional[int] = None
+    must_have_skills: Optional[str] = None
+    company_name: Optional[str] = None
+    employment_type: Optional[str] = None
+
+
+JobDescriptionMetadata = Annotated[
+    Union[UploadMetadata, ManualInputMetadata, AIGeneratedMetadata],
+    Field(discriminator="source")
+]
+
+
 class JobDescriptionDocument(BaseModel):
     """MongoDB document model for job descriptions"""
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     job_description: str = Field(..., description="Job description text")
     source: str = Field(..., description="Source of job description (upload, manual, ai_generated)")
     filename: Optional[str] = Field(None, description="Original filename if uploaded")
-    metadata: Optional[dict] = Field(default=None, description="Additional metadata")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    metadata: Optional[JobDescriptionMetadata] = Field(default=None, description="Additional metadata")
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
 
 
 class CandidateDocument(BaseModel):
@@ -57,13 +113,12 @@ class CandidateDocument(BaseModel):
     matching_skills: List[str] = Field(default=[], description="List of matching skills")
     missing_skills: List[str] = Field(default=[], description="List of missing skills")
     remarks: str = Field(..., description="AI-generated remarks about the candidate")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
 
 
 class MatchingSessionDocument(BaseModel):
@@ -73,9 +128,9 @@ class MatchingSessionDocument(BaseModel):
     total_candidates: int = Field(..., description="Total number of candidates processed")
     best_match_score: float = Field(..., description="Best matching score")
     best_match_candidate_id: Optional[PyObjectId] = Field(None, description="Reference to best match candidate")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    average_score: Optional[float] = Field(None, description="Average matching score")
+    created_at: datetime = Field(default_factory=utc_now)
 
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
@@ -2,7 +2,7 @@
 Pydantic models for Resume
 """
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ResumeMatchResult(BaseModel):
@@ -15,6 +15,15 @@ class ResumeMatchResult(BaseModel):
     extracted_text: str = Field(..., description="Extracted resume text")
 
 
+class CandidateContact(BaseModel):
+    """Candidate contact details supplied alongside a resume"""
+    model_config = ConfigDict(extra="ignore")
+
+    name: str = Field(default="Unknown", description="Candidate name")
+    email: str = Field(default="unknown@example.com", description="Candidate email")
+    phone: Optional[str] = Field(default=None, description="Candidate phone number")
+
+
 class ResumeMatchingRequest(BaseModel):
     """Request model for resume matching"""
     job_description: str = Field(..., description="Job description text")
@@ -22,7 +31,7 @@ class ResumeMatchingRequest(BaseModel):
     resume_texts: List[str] = Field(..., description="List of resume texts")
     resume_filenames: List[str] = Field(..., description="List of resume filenames")
     skills_keywords: Optional[List[str]] = Field(default=None, description="Required skills keywords")
-    candidate_info: Optional[List[dict]] = Field(default=None, description="Candidate information (name, email, phone)")
+    candidate_info: Optional[List[CandidateContact]] = Field(default=None, description="Candidate information (name, email, phone)")
 
 
 class ResumeMatchingResponse(BaseModel):
@@ -30,4 +39,5 @@ class ResumeMatchingResponse(BaseModel):
     results: List[ResumeMatchResult] = Field(..., description="List of matching results")
     best_match: Optional[ResumeMatchResult] = Field(default=None, description="Best matching candidate")
     total_candidates: int = Field(..., description="Total number of candidates evaluated")
+    skipped_files: List[str] = Field(default_factory=list, description="Resumes skipped for having no extractable text")
 
@@ -1,35 +1,88 @@
 """
 Router for Database Operations
 """
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-
-from app.services.database_service import mongodb_service
+import asyncio
+import hashlib
+import weakref
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from cachetools import TTLCache
+
+from app.services.database_service import get_mongodb_service
+from app.utilities.json_utils import MongoJSONResponse
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 router = APIRouter()
 
+# Seconds a rendered GET response is shared between callers (and may be reused by clients)
+RESPONSE_CACHE_TTL_SECONDS = 5
+
+_response_cache: TTLCache = TTLCache(maxsize=256, ttl=RESPONSE_CACHE_TTL_SECONDS)
+_response_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def _render_cached(key: str, fetch: Callable[[], Awaitable[Any]], envelope: Optional[str],
+                         not_found: Optional[str]) -> Tuple[str, bytes]:
+    """Return (etag, body) for key, running one fetch per TTL window even under concurrent polls"""
+    entry = _response_cache.get(key)
+    if entry is not None:
+        return entry
+
+    lock = _response_locks.get(key)
+    if lock is None:
+        lock = _response_locks[key] = asyncio.Lock()
+    async with lock:
+        entry = _response_cache.get(key)
+        if entry is not None:
+            return entry
+
+        data = await fetch()
+        if not data and not_found:
+            raise HTTPException(status_code=404, detail=not_found)
+        if envelope:
+            data = {envelope: data}
+
+        body = MongoJSONResponse(data).body
+        entry = (f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body)
+        _response_cache[key] = entry
+        return entry
+
+
+async def cached_json_response(request: Request, fetch: Callable[[], Awaitable[Any]],
+                               envelope: Optional[str] = None, not_found: Optional[str] = None) -> Response:
+    """Serve a GET result with ETag/Cache-Control, answering 304 when the client copy is current"""
+    key = f"{request.url.path}?{request.url.query}" if request.url.query else request.url.path
+    etag, body = await _render_cached(key, fetch, envelope, not_found)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={RESPONSE_CACHE_TTL_SECONDS}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("/database/job-descriptions")
-async def get_all_job_descriptions():
-    """Get all job descriptions from database"""
+async def get_all_job_descriptions(request: Request, summary_only: bool = False):
+    """Get all job descriptions from database (summary_only omits the description text)"""
     try:
-        job_descriptions = await mongodb_service.get_all_job_descriptions()
-        return {"job_descriptions": job_descriptions}
+        return await cached_json_response(
+            request,
+            lambda: get_mongodb_service().get_all_job_descriptions(summary_only=summary_only),
+            envelope="job_descriptions"
+        )
     except Exception as e:
         logger.error(f"Error getting job descriptions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/database/job-descriptions/{job_description_id}")
-async def get_job_description(job_description_id: str):
+async def get_job_description(job_description_id: str, request: Request):
     """Get specific job description by ID"""
     try:
-        job_description = await mongodb_service.get_job_description(job_description_id)
-        if not job_description:
-            raise HTTPException(status_code=404, detail="Job description not found")
-        return job_description
+        return await cached_json_response(
+            request,
+            lambda: get_mongodb_service().get_job_description(job_description_id),
+            not_found="Job description not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -38,57 +91,62 @@ async def get_job_description(job_description_id: str):
 
 
 @router.get("/database/job-descriptions/{job_description_id}/candidates")
-async def get_candidates_by_job_description(job_description_id: str):
+async def get_candidates_by_job_description(job_description_id: str, request: Request):
     """Get all candidates for a specific job description"""
     try:
-        candidates = await mongodb_service.get_candidates_by_job_description(job_description_id)
-        return {"candidates": candidates}
+        return await cached_json_response(
+            request,
+            lambda: get_mongodb_service().get_candidates_by_job_description(job_description_id),
+            envelope="candidates"
+        )
     except Exception as e:
         logger.error(f"Error getting candidates: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/database/candidates")
-async def get_all_candidates():
-    """Get all candidates from database"""
+async def get_all_candidates(request: Request, summary_only: bool = False):
+    """Get all candidates from database (summary_only omits the AI remarks)"""
     try:
-        candidates = await mongodb_service.get_all_candidates()
-        return {"candidates": candidates}
+        return await cached_json_response(
+            request,
+            lambda: get_mongodb_service().get_all_candidates(summary_only=summary_only),
+            envelope="candidates"
+        )
     except Exception as e:
         logger.error(f"Error getting candidates: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/database/matching-sessions")
-async def get_matching_sessions():
+async def get_matching_sessions(request: Request):
     """Get all matching sessions"""
     try:
-        sessions = await mongodb_service.get_matching_sessions()
-        return {"sessions": sessions}
+        return await cached_json_response(request, get_mongodb_service().get_matching_sessions, envelope="sessions")
     except Exception as e:
         logger.error(f"Error getting matching sessions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/database/summary")
-async def get_data_summary():
+async def get_data_summary(request: Request):
     """Get summary of all data in database"""
     try:
-        summary = await mongodb_service.get_all_data_summary()
-        return summary
+        return await cached_json_response(request, get_mongodb_service().get_all_data_summary)
     except Exception as e:
         logger.error(f"Error getting data summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/database/job-descriptions/{job_description_id}/full")
-async def get_job_description_with_candidates(job_description_id: str):
+async def get_job_description_with_candidates(job_description_id: str, request: Request):
     """Get job description with all its candidates"""
     try:
-        data = await mongodb_service.get_job_description_with_candidates(job_description_id)
-        if not data:
-            raise HTTPException(status_code=404, detail="Job description not found")
-        return data
+        return await cached_json_response(
+            request,
+            lambda: get_mongodb_service().get_job_description_with_candidates(job_description_id),
+            not_found="Job description not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -2,19 +2,49 @@
 Router for Email Generation
 """
 from fastapi import APIRouter, HTTPException
-import json
+import asyncio
 import re
 
 from app.services.ai_service.ai_provider import AIProviderFactory
+from app.services.ai_service.prompt_cache import generate_text_cached
 from app.utilities.logger import setup_logger
-from app.utilities.prompts import GENERATE_INTERVIEW_EMAIL, GENERATE_REJECTION_EMAIL
+from app.utilities.json_utils import parse_json_response
+from app.utilities.prompts import (
+    GENERATE_INTERVIEW_EMAIL_SYSTEM,
+    GENERATE_REJECTION_EMAIL_SYSTEM,
+    GENERATE_EMAIL_DETAILS,
+    EMAIL_JSON_SCHEMA,
+    build_messages
+)
 from app.models.email import EmailGenerationRequest, EmailGenerationResponse, ResumeMatchingSummary, CandidateInfo
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 logger = setup_logger()
 router = APIRouter()
 
+# System prompt per email type; compose_email rejects any other type
+_EMAIL_SYSTEM_PROMPTS = {
+    "interview": GENERATE_INTERVIEW_EMAIL_SYSTEM,
+    "rejection": GENERATE_REJECTION_EMAIL_SYSTEM
+}
+
+# Concurrent LLM calls per batch request
+BATCH_EMAIL_CONCURRENCY = 10
+
+_TITLE_RE = re.compile(r'(?:position|role|title)[:.]?\s*([A-Za-z\s]+)', re.IGNORECASE)
+
+# (ResumeMatchingSummary field, line template, max list items or None for scalars), in prompt order
+_SUMMARY_FIELDS = (
+    ("matching_skills", "✅ Matching Skills: {}", 5),
+    ("experience_years", "📈 Experience: {} years", None),
+    ("relevant_experience", "💼 Relevant Experience: {}", None),
+    ("education", "🎓 Education: {}", None),
+    ("strengths", "🌟 Key Strengths: {}", 3),
+    ("missing_skills", "⚠️ Areas for Growth: {}", 3),
+    ("remarks", "📝 Analysis: {}", None),
+)
+
 
 class EmailWithMatchingRequest(BaseModel):
     """Request model for email generation with matching data"""
@@ -28,22 +58,15 @@ class EmailWithMatchingRequest(BaseModel):
     matching_result: Optional[Dict[str, Any]] = None
 
 
-def clean_json_response(response: str) -> str:
-    """Clean JSON response from AI models"""
-    cleaned = response.strip()
-    
-    # Remove markdown code blocks
-    if "```json" in cleaned:
-        cleaned = cleaned.split("```json")[1].split("```")[0].strip()
-    elif "```" in cleaned:
-        cleaned = cleaned.split("```")[1].split("```")[0].strip()
-    
-    # Try to extract JSON if there's extra text
-    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if json_match:
-        cleaned = json_match.group()
-    
-    return cleaned
+class BatchEmailRequest(BaseModel):
+    """Request model for batch email generation"""
+    requests: List[EmailGenerationRequest]
+
+
+class BatchEmailResponse(BaseModel):
+    """Response model for batch email generation, aligned with the request list"""
+    results: List[Optional[EmailGenerationResponse]]
+    errors: List[Optional[str]]
 
 
 def format_matching_summary(matching_summary):
@@ -52,52 +75,24 @@ def format_matching_summary(matching_summary):
         return "No detailed matching analysis available."
     
     summary_parts = []
+    for field, template, limit in _SUMMARY_FIELDS:
+        value = getattr(matching_summary, field)
+        if not value:
+            continue
+        if limit:
+            value = ", ".join(value[:limit])
+        summary_parts.append(template.format(value))
     
-    # Add matching skills
-    if matching_summary.matching_skills:
-        skills_text = ", ".join(matching_summary.matching_skills[:5])  # Limit to top 5
-        summary_parts.append(f"✅ Matching Skills: {skills_text}")
-    
-    # Add experience info
-    if matching_summary.experience_years:
-        summary_parts.append(f"📈 Experience: {matching_summary.experience_years} years")
-    
-    if matching_summary.relevant_experience:
-        summary_parts.append(f"💼 Relevant Experience: {matching_summary.relevant_experience}")
-    
-    # Add education
-    if matching_summary.education:
-        summary_parts.append(f"🎓 Education: {matching_summary.education}")
-    
-    # Add strengths
-    if matching_summary.strengths:
-        strengths_text = ", ".join(matching_summary.strengths[:3])  # Limit to top 3
-        summary_parts.append(f"🌟 Key Strengths: {strengths_text}")
-    
-    # Add missing skills (for rejection emails)
-    if matching_summary.missing_skills:
-        missing_text = ", ".join(matching_summary.missing_skills[:3])  # Limit to top 3
-        summary_parts.append(f"⚠️ Areas for Growth: {missing_text}")
-    
-    # Add detailed remarks
-    if matching_summary.remarks:
-        summary_parts.append(f"📝 Analysis: {matching_summary.remarks}")
-    
-    formatted_summary = "\n".join(summary_parts) if summary_parts else "No detailed matching analysis available."
-    
-    # Debug logging
-    logger.info(f"Formatted matching summary: {formatted_summary}")
-    
-    return formatted_summary
+    return "\n".join(summary_parts) if summary_parts else "No detailed matching analysis available."
 
 
 def convert_resume_match_to_summary(match_result: dict) -> ResumeMatchingSummary:
     """Convert resume matching result to ResumeMatchingSummary format"""
     resume_info = match_result.get('resume_info', {})
     
-    # Debug logging
-    logger.info(f"Converting match result: {match_result}")
-    logger.info(f"Resume info: {resume_info}")
+    # Lazy %-formatting: the dicts are only repr'd when DEBUG is enabled
+    logger.debug("Converting match result: %s", match_result)
+    logger.debug("Resume info: %s", resume_info)
     
     return ResumeMatchingSummary(
         matching_skills=match_result.get('matching_skills', []),
@@ -114,11 +109,13 @@ def convert_resume_match_to_summary(match_result: dict) -> ResumeMatchingSummary
 async def generate_email_with_matching(
     request: EmailWithMatchingRequest,
     provider: str = "openai",
-    api_key: str = None
+    api_key: str = None,
+    refresh: bool = False
 ):
     """
     Generate personalized email with resume matching data
     This endpoint accepts resume matching results and generates personalized emails
+    refresh=true skips the prompt cache and drafts a new email
     """
     try:
         logger.info(f"Generating {request.email_type} email for {request.candidate_name} with matching data")
@@ -147,17 +144,75 @@ async def generate_email_with_matching(
         )
         
         # Generate email using the main function
-        return await generate_email(email_request, provider, api_key)
+        return await generate_email(email_request, provider, api_key, refresh)
         
     except Exception as e:
         logger.exception(f"Error generating email with matching: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def compose_email(request: EmailGenerationRequest, ai_provider, refresh: bool = False) -> EmailGenerationResponse:
+    """Generate one email with an already created AI provider; refresh bypasses the prompt cache"""
+    # Extract job title from JD if not provided
+    job_title = request.job_title or "the position"
+    if job_title == "the position":
+        jd_text = request.job_description[:500]
+        title_match = _TITLE_RE.search(jd_text)
+        if title_match:
+            job_title = title_match.group(1).strip()
+    
+    # Format matching summary
+    matching_summary_text = format_matching_summary(request.candidate_info.matching_summary)
+    
+    # Static instructions go in the system message, candidate details in the user message
+    system_prompt = _EMAIL_SYSTEM_PROMPTS.get(request.email_type)
+    if system_prompt is None:
+        raise ValueError("email_type must be either 'interview' or 'rejection'")
+    prompt = build_messages(system_prompt, GENERATE_EMAIL_DETAILS.format(
+        candidate_name=request.candidate_info.name,
+        candidate_email=request.candidate_info.email,
+        score=request.candidate_info.score,
+        matching_summary=matching_summary_text,
+        job_title=job_title,
+        company_name=request.company_name,
+        manager_name=request.hiring_manager_name
+    ))
+    
+    # Generate email; only parseable JSON is cached, so a refusal or broken draft is never served again
+    response = await generate_text_cached(
+        ai_provider, prompt, validate=parse_json_response, refresh=refresh,
+        temperature=0.7, json_mode=True, json_schema=EMAIL_JSON_SCHEMA
+    )
+    
+    # Parse JSON response
+    try:
+        email_data = parse_json_response(response)
+        
+        return EmailGenerationResponse(
+            email_subject=email_data.get('subject', f"Application Update - {job_title}"),
+            email_body=email_data.get('body', response),
+            candidate_name=request.candidate_info.name,
+            email_type=request.email_type,
+            personalized_insights=matching_summary_text
+        )
+    except ValueError:
+        logger.error(f"Failed to parse JSON response: {response[:200]}")
+        # Fallback: use the response as body with a default subject
+        return EmailGenerationResponse(
+            email_subject=f"{'Interview Invitation' if request.email_type == 'interview' else 'Application Update'} - {job_title}",
+            email_body=response,
+            candidate_name=request.candidate_info.name,
+            email_type=request.email_type,
+            personalized_insights=matching_summary_text
+        )
+
+
 @router.post("/email/generate", response_model=EmailGenerationResponse)
-async def generate_email(request: EmailGenerationRequest, provider: str = "openai", api_key: str = None):
+async def generate_email(request: EmailGenerationRequest, provider: str = "openai", api_key: str = None,
+                         refresh: bool = False):
     """
     Generate personalized emails for candidates with resume matching insights
+    refresh=true skips the prompt cache and drafts a new email
     """
     try:
         logger.info(f"Generating {request.email_type} email for {request.candidate_info.name}")
@@ -175,67 +230,52 @@ async def generate_email(request: EmailGenerationRequest, provider: str = "opena
             api_key=api_key
         )
         
-        # Extract job title from JD if not provided
-        job_title = request.job_title or "the position"
-        if job_title == "the position":
-            jd_text = request.job_description[:500]
-            title_match = re.search(r'(?:position|role|title)[:.]?\s*([A-Za-z\s]+)', jd_text, re.IGNORECASE)
-            if title_match:
-                job_title = title_match.group(1).strip()
+        return await compose_email(request, ai_provider, refresh)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error generating email: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/email/generate-batch", response_model=BatchEmailResponse)
+async def generate_email_batch(body: BatchEmailRequest, provider: str = "openai", api_key: str = None,
+                               refresh: bool = False):
+    """
+    Generate emails for several candidates concurrently with a shared AI provider
+    refresh=true skips the prompt cache and drafts new emails
+    """
+    try:
+        logger.info(f"Generating {len(body.requests)} emails in batch")
+        
+        ai_provider = AIProviderFactory.create_provider(
+            provider_type=provider,
+            api_key=api_key
+        )
+        
+        sem = asyncio.Semaphore(BATCH_EMAIL_CONCURRENCY)
         
-        # Format matching summary
-        matching_summary_text = format_matching_summary(request.candidate_info.matching_summary)
+        async def _one(email_request: EmailGenerationRequest) -> EmailGenerationResponse:
+            async with sem:
+                return await compose_email(email_request, ai_provider, refresh)
         
-        # Select appropriate prompt
-        if request.email_type == "interview":
-            prompt = GENERATE_INTERVIEW_EMAIL.format(
-                candidate_name=request.candidate_info.name,
-                candidate_email=request.candidate_info.email,
-                score=request.candidate_info.score,
-                matching_summary=matching_summary_text,
-                job_title=job_title,
-                company_name=request.company_name,
-                manager_name=request.hiring_manager_name
-            )
-        else:
-            prompt = GENERATE_REJECTION_EMAIL.format(
-                candidate_name=request.candidate_info.name,
-                candidate_email=request.candidate_info.email,
-                score=request.candidate_info.score,
-                matching_summary=matching_summary_text,
-                job_title=job_title,
-                company_name=request.company_name,
-                manager_name=request.hiring_manager_name
-            )
+        outcomes = await asyncio.gather(*map(_one, body.requests), return_exceptions=True)
         
-        # Generate email
-        response = await ai_provider.generate_text(prompt, temperature=0.7)
+        # One slot per request: a result or the error message
+        results = []
+        errors = []
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                logger.error(f"Error generating email in batch: {outcome}")
+                results.append(None)
+                errors.append(str(outcome))
+            else:
+                results.append(outcome)
+                errors.append(None)
         
-        # Parse JSON response
-        try:
-            cleaned = clean_json_response(response)
-            email_data = json.loads(cleaned)
-            
-            return EmailGenerationResponse(
-                email_subject=email_data.get('subject', f"Application Update - {job_title}"),
-                email_body=email_data.get('body', response),
-                candidate_name=request.candidate_info.name,
-                email_type=request.email_type,
-                personalized_insights=matching_summary_text
-            )
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response: {response[:200]}")
-            # Fallback: use the response as body with a default subject
-            return EmailGenerationResponse(
-                email_subject=f"{'Interview Invitation' if request.email_type == 'interview' else 'Application Update'} - {job_title}",
-                email_body=response,
-                candidate_name=request.candidate_info.name,
-                email_type=request.email_type,
-                personalized_insights=matching_summary_text
-            )
+        return BatchEmailResponse(results=results, errors=errors)
     
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.exception(f"Error generating email: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception(f"Error generating email batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
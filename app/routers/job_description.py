@@ -4,19 +4,28 @@ Router for Job Description management
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import Optional
 import tempfile
-import os
+from bson import ObjectId
 
 from app.models.job_description import JobDescriptionGenerateRequest, JobDescriptionResponse, EmploymentType
 from app.services.ai_service.ai_provider import AIProviderFactory
+from app.services.ai_service.prompt_cache import generate_text_cached
 from app.services.document_processor import extract_text_from_file
-from app.services.database_service import mongodb_service
-from app.utilities.file_handler import save_uploaded_file, get_file_extension, validate_file_extension
+from app.services.database_service import get_mongodb_service
+from app.utilities.file_handler import stream_upload_to_temp, delete_file_async, get_file_extension, validate_file_extension
 from app.utilities.logger import setup_logger
-from app.utilities.prompts import GENERATE_JOB_DESCRIPTION
+from app.utilities.prompts import GENERATE_JOB_DESCRIPTION_SYSTEM, GENERATE_JOB_DESCRIPTION, build_messages
 
 logger = setup_logger()
 router = APIRouter()
 
+MIN_JOB_DESCRIPTION_LENGTH = 50
+
+
+def _require_text(job_description: str):
+    """Reject generated text too short to be a job description (e.g. a refusal), so it is not cached"""
+    if len(job_description.strip()) < MIN_JOB_DESCRIPTION_LENGTH:
+        raise ValueError("Generated job description is too short")
+
 
 @router.post("/job-description/upload", response_model=JobDescriptionResponse)
 async def upload_job_description(file: UploadFile = File(...)):
@@ -31,25 +40,28 @@ async def upload_job_description(file: UploadFile = File(...)):
                 detail="Unsupported file format. Please upload PDF, DOC, or DOCX files."
             )
         
-        # Save uploaded file
-        file_path = save_uploaded_file(file.file, file.filename)
+        # Stream uploaded file to disk
+        file_path = await stream_upload_to_temp(file, file.filename)
         file_ext = get_file_extension(file.filename)
         
         logger.info(f"Extracting text from {file.filename}")
         
         # Extract text
-        job_description_text = extract_text_from_file(file_path, file_ext)
+        try:
+            job_description_text = await extract_text_from_file(file_path, file_ext)
+        finally:
+            await delete_file_async(file_path)
         
-        # Clean up
-        os.remove(file_path)
-        
-        # Save to MongoDB
-        job_description_id = await mongodb_service.save_job_description(
+        # Save to MongoDB in the background; the ID is generated up front
+        job_description_id = str(ObjectId())
+        mongodb_service = get_mongodb_service()
+        mongodb_service.schedule_write(mongodb_service.save_job_description(
             job_description=job_description_text,
             source="upload",
             filename=file.filename,
-            metadata={"file_size": file.size}
-        )
+            metadata={"file_size": file.size},
+            job_description_id=job_description_id
+        ))
         
         return JobDescriptionResponse(
             job_description=job_description_text,
@@ -71,18 +83,24 @@ async def input_job_description(job_description: str):
     Submit job description via text input
     """
     try:
-        if not job_description or len(job_description.strip()) < 50:
+        # Only strip (an O(n) copy) when the text is padded with whitespace
+        length = len(job_description) if job_description else 0
+        padded = length > 0 and (job_description[0].isspace() or job_description[-1].isspace())
+        if length < MIN_JOB_DESCRIPTION_LENGTH or (padded and len(job_description.strip()) < MIN_JOB_DESCRIPTION_LENGTH):
             raise HTTPException(
                 status_code=400,
-                detail="Job description must be at least 50 characters long."
+                detail=f"Job description must be at least {MIN_JOB_DESCRIPTION_LENGTH} characters long."
             )
         
-        # Save to MongoDB
-        job_description_id = await mongodb_service.save_job_description(
+        # Save to MongoDB in the background; the ID is generated up front
+        job_description_id = str(ObjectId())
+        mongodb_service = get_mongodb_service()
+        mongodb_service.schedule_write(mongodb_service.save_job_description(
             job_description=job_description,
             source="manual_input",
-            metadata={"source": "manual_input"}
-        )
+            metadata={"source": "manual_input"},
+            job_description_id=job_description_id
+        ))
         
         return JobDescriptionResponse(
             job_description=job_description,
@@ -98,9 +116,11 @@ async def input_job_description(job_description: str):
 
 
 @router.post("/job-description/generate", response_model=JobDescriptionResponse)
-async def generate_job_description(request: JobDescriptionGenerateRequest, provider: str = "openai", api_key: str = None):
+async def generate_job_description(request: JobDescriptionGenerateRequest, provider: str = "openai", api_key: str = None,
+                                   refresh: bool = False):
     """
     Generate a job description using AI based on job requirements
+    refresh=true skips the prompt cache and generates a new description
     """
     try:
         logger.info(f"Generating job description for {request.job_title} using {provider}")
@@ -111,7 +131,7 @@ async def generate_job_description(request: JobDescriptionGenerateRequest, provi
             api_key=api_key
         )
         
-        prompt = GENERATE_JOB_DESCRIPTION.format(
+        prompt = build_messages(GENERATE_JOB_DESCRIPTION_SYSTEM, GENERATE_JOB_DESCRIPTION.format(
             job_title=request.job_title,
             years_of_experience=request.years_of_experience,
             must_have_skills=request.must_have_skills,
@@ -119,12 +139,16 @@ async def generate_job_description(request: JobDescriptionGenerateRequest, provi
             employment_type=request.employment_type,
             industry=request.industry,
             location=request.location
-        )
+        ))
         
-        job_description = await ai_provider.generate_text(prompt, temperature=0.7)
+        job_description = await generate_text_cached(
+            ai_provider, prompt, validate=_require_text, refresh=refresh, temperature=0.7
+        )
         
-        # Save to MongoDB
-        job_description_id = await mongodb_service.save_job_description(
+        # Save to MongoDB in the background; the ID is generated up front
+        job_description_id = str(ObjectId())
+        mongodb_service = get_mongodb_service()
+        mongodb_service.schedule_write(mongodb_service.save_job_description(
             job_description=job_description,
             source="ai_generated",
             metadata={
@@ -134,9 +158,10 @@ async def generate_job_description(request: JobDescriptionGenerateRequest, provi
                 "years_of_experience": request.years_of_experience,
                 "must_have_skills": request.must_have_skills,
                 "company_name": request.company_name,
-                "employment_type": request.employment_type
-            }
-        )
+                "employment_type": request.employment_type.value
+            },
+            job_description_id=job_description_id
+        ))
         
         return JobDescriptionResponse(
             job_description=job_description,
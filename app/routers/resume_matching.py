@@ -1,18 +1,281 @@
 """
 Router for Resume Matching
 """
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import json
+import os
+import orjson
 
-from app.models.resume import ResumeMatchingRequest, ResumeMatchingResponse
-from app.services.matching_service.resume_matcher import match_resumes
+from app.models.resume import ResumeMatchingRequest, ResumeMatchingResponse, CandidateContact
+from app.models.database import as_object_id, utc_now
+from app.services.matching_service.resume_matcher import match_resumes, iter_match_results, summarize_scores
 from app.services.ai_service.ai_provider import AIProviderFactory
-from app.services.database_service import mongodb_service
+from app.services.database_service import get_mongodb_service
+from app.services.document_processor import extract_text_from_file, extract_text_with_ocr, run_extractor
+from app.utilities.file_handler import stream_upload_to_temp, delete_file_async, get_file_extension, validate_file_extension
+from app.utilities.json_utils import MongoJSONResponse
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 router = APIRouter()
 
+MAX_RESUMES_PER_REQUEST = 10
+
+# Resumes with less extracted text than this are treated as scanned/empty
+MIN_RESUME_TEXT_LENGTH = 50
+
+# Optional cheaper model of the same provider that drafts match scores; only
+# borderline drafts are re-scored by the main model
+MATCH_DRAFT_MODEL = os.getenv("MATCH_DRAFT_MODEL")
+
+# Optional OpenAI-compatible server (e.g. vLLM serving a quantized model) for
+# the resume/JD extraction calls; matching stays on the selected provider
+EXTRACTION_BASE_URL = os.getenv("EXTRACTION_BASE_URL")
+EXTRACTION_MODEL = os.getenv("EXTRACTION_MODEL", "Qwen/Qwen2.5-7B-Instruct-AWQ")
+
+
+def drop_empty_resumes(
+    resume_texts: List[str],
+    resume_filenames: List[str],
+    candidate_info: Optional[List[CandidateContact]] = None
+) -> Tuple[List[str], List[str], Optional[List[CandidateContact]], List[str]]:
+    """Skip empty/scanned resumes before spending LLM calls on them"""
+    skipped_files = []
+    kept = []
+    for i, (text, filename) in enumerate(zip(resume_texts, resume_filenames)):
+        if len(text.strip()) < MIN_RESUME_TEXT_LENGTH:
+            logger.warning(f"Skipping {filename}: no extractable text (likely scanned)")
+            skipped_files.append(filename)
+        else:
+            kept.append(i)
+
+    if skipped_files:
+        resume_texts = [resume_texts[i] for i in kept]
+        resume_filenames = [resume_filenames[i] for i in kept]
+        if candidate_info:
+            candidate_info = [candidate_info[i] for i in kept if i < len(candidate_info)]
+
+    return resume_texts, resume_filenames, candidate_info, skipped_files
+
+
+def create_matching_provider(provider: str, use_ai: bool, api_key: Optional[str] = None):
+    """Create the AI provider for matching; returns (provider, use_ai) with basic matching as fallback"""
+    if not use_ai:
+        return None, False
+    try:
+        return AIProviderFactory.create_provider(provider_type=provider, api_key=api_key), True
+    except Exception as e:
+        logger.warning(f"Failed to initialize AI provider, using basic matching: {e}")
+        return None, False
+
+
+def create_draft_provider(provider: str, ai_provider, api_key: Optional[str] = None):
+    """Create the draft matching provider for MATCH_DRAFT_MODEL; None when unset, same as the main model or unavailable"""
+    if ai_provider is None or not MATCH_DRAFT_MODEL or MATCH_DRAFT_MODEL == getattr(ai_provider, "model", None):
+        return None
+    try:
+        return AIProviderFactory.create_provider(provider_type=provider, api_key=api_key, model=MATCH_DRAFT_MODEL)
+    except Exception as e:
+        logger.warning(f"Failed to initialize draft matching model, matching with the main model only: {e}")
+        return None
+
+
+def create_extraction_provider(ai_provider):
+    """Create the extraction provider for EXTRACTION_BASE_URL; None to extract with the matching provider"""
+    if ai_provider is None or not EXTRACTION_BASE_URL:
+        return None
+    try:
+        return AIProviderFactory.create_provider(
+            provider_type="openai",
+            base_url=EXTRACTION_BASE_URL,
+            model=EXTRACTION_MODEL,
+            api_key=os.getenv("EXTRACTION_API_KEY")
+        )
+    except Exception as e:
+        logger.warning(f"Failed to initialize extraction model, extracting with the matching provider: {e}")
+        return None
+
+
+def to_match_dict(result: dict) -> dict:
+    """Shape a matcher result like ResumeMatchResult without running model validation"""
+    return {
+        'filename': result['filename'],
+        'score': float(result['score']),
+        'missing_skills': result.get('missing_skills') or [],
+        'matching_skills': result.get('matching_skills') or [],
+        'remarks': str(result['remarks']),
+        'extracted_text': result['extracted_text']
+    }
+
+
+def candidate_payload(result: dict, info: Optional[CandidateContact] = None) -> dict:
+    """Candidate document fields for a match result; contact details default to ones derived from the filename"""
+    if info:
+        candidate_name, candidate_email, candidate_phone = info.name, info.email, info.phone
+    else:
+        candidate_name = result['filename'].split('.')[0].replace('_', ' ').title()
+        candidate_email = f"{candidate_name.lower().replace(' ', '.')}@example.com"
+        candidate_phone = None
+
+    return {
+        "name": candidate_name,
+        "email": candidate_email,
+        "phone": candidate_phone,
+        "filename": result['filename'],
+        "matching_score": result['score'],
+        "matching_skills": result.get('matching_skills', []),
+        "missing_skills": result.get('missing_skills', []),
+        "remarks": result['remarks']
+    }
+
+
+async def iter_and_save_matches(
+    resume_texts: List[str],
+    resume_filenames: List[str],
+    job_description: str,
+    ai_provider,
+    use_ai: bool,
+    skills_keywords: Optional[List[str]],
+    job_description_id: Optional[str] = None,
+    candidate_info: Optional[List[CandidateContact]] = None,
+    draft_provider=None,
+    extraction_provider=None
+) -> AsyncIterator[dict]:
+    """Yield match results as they complete, inserting each candidate (if job_description_id) as soon as it is scored"""
+    service = get_mongodb_service() if job_description_id else None
+    if service:
+        try:
+            # Parsed once here instead of on every candidate insert
+            job_description_id = as_object_id(job_description_id)
+        except ValueError:
+            logger.error(f"Invalid job_description_id {job_description_id!r}; matching results will not be saved")
+            service = None
+    saved_at = utc_now()
+    candidate_ids = service.new_object_ids(len(resume_texts), saved_at) if service else []
+    results: List[Optional[dict]] = [None] * len(resume_texts)
+    pending = []
+
+    async for index, result in iter_match_results(
+        resume_texts=resume_texts,
+        filenames=resume_filenames,
+        job_description=job_description,
+        provider=ai_provider,
+        use_ai=use_ai,
+        required_skills=skills_keywords,
+        draft_provider=draft_provider,
+        extraction_provider=extraction_provider
+    ):
+        results[index] = result
+        if service:
+            info = candidate_info[index] if candidate_info and index < len(candidate_info) else None
+            # Overlaps each insert with the LLM calls still running
+            pending.append(service.schedule_write(service.save_candidates_with_fallback(
+                job_description_id,
+                [candidate_payload(result, info)],
+                candidate_ids=[candidate_ids[index]],
+                created_at=saved_at
+            )))
+        yield result
+
+    if not service:
+        return
+
+    # The session needs every score; candidate inserts are mostly done by now
+    best_idx, best_score, average_score = summarize_scores(results)
+    outcomes = await asyncio.gather(
+        service.save_matching_session(
+            job_description_id=job_description_id,
+            total_candidates=len(results),
+            best_match_score=best_score,
+            best_match_candidate_id=candidate_ids[best_idx] if best_idx >= 0 else None,
+            average_score=average_score,
+            created_at=saved_at
+        ),
+        *pending,
+        return_exceptions=True
+    )
+    failed = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if failed:
+        # Don't fail the request if MongoDB save fails
+        logger.error(f"Error saving matching results to MongoDB ({len(failed)} failed writes): {failed[0]}")
+    else:
+        logger.info(f"Saved {len(results)} candidates to MongoDB")
+
+
+async def run_resume_matching(
+    job_description: str,
+    resume_texts: List[str],
+    resume_filenames: List[str],
+    provider: str,
+    use_ai: bool,
+    api_key: Optional[str] = None,
+    job_description_id: Optional[str] = None,
+    skills_keywords: Optional[List[str]] = None,
+    candidate_info: Optional[List[CandidateContact]] = None
+) -> MongoJSONResponse:
+    """Match resume texts against a job description and persist the candidates"""
+    resume_texts, resume_filenames, candidate_info, skipped_files = drop_empty_resumes(
+        resume_texts, resume_filenames, candidate_info
+    )
+
+    ai_provider, use_ai = create_matching_provider(provider, use_ai, api_key)
+    draft_provider = create_draft_provider(provider, ai_provider, api_key)
+    extraction_provider = create_extraction_provider(ai_provider)
+
+    if job_description_id:
+        # Persisting: pipeline each candidate insert behind its own LLM result
+        results = [
+            result async for result in iter_and_save_matches(
+                resume_texts, resume_filenames, job_description, ai_provider, use_ai,
+                skills_keywords, job_description_id, candidate_info, draft_provider, extraction_provider
+            )
+        ]
+        results.sort(key=lambda x: x['score'], reverse=True)
+    else:
+        results = await match_resumes(
+            resume_texts=resume_texts,
+            filenames=resume_filenames,
+            job_description=job_description,
+            provider=ai_provider,
+            use_ai=use_ai,
+            required_skills=skills_keywords,
+            draft_provider=draft_provider,
+            extraction_provider=extraction_provider
+        )
+
+    # Convert to response format
+    match_results = [to_match_dict(r) for r in results]
+
+    # Get best match (first result, already sorted by score)
+    best_match = match_results[0] if match_results else None
+
+    # Results are built from trusted matcher output, so the response skips
+    # ResumeMatchingResponse validation; the model still documents the schema
+    return MongoJSONResponse({
+        'results': match_results,
+        'best_match': best_match,
+        'total_candidates': len(results),
+        'skipped_files': skipped_files
+    })
+
+
+def validate_matching_request(request: ResumeMatchingRequest):
+    """Reject oversized or misaligned matching requests"""
+    if len(request.resume_texts) > MAX_RESUMES_PER_REQUEST:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {MAX_RESUMES_PER_REQUEST} resumes allowed per request"
+        )
+
+    if len(request.resume_texts) != len(request.resume_filenames):
+        raise HTTPException(
+            status_code=400,
+            detail="Number of resume texts must match number of filenames"
+        )
+
 
 @router.post("/resume-matching/match", response_model=ResumeMatchingResponse)
 async def match_resumes_with_jd(request: ResumeMatchingRequest, provider: str = "openai", use_ai: bool = True, api_key: str = None):
@@ -21,117 +284,131 @@ async def match_resumes_with_jd(request: ResumeMatchingRequest, provider: str =
     """
     try:
         logger.info(f"Matching {len(request.resume_texts)} resumes with AI: {use_ai}")
-        
-        if len(request.resume_texts) > 10:
-            raise HTTPException(
-                status_code=400,
-                detail="Maximum 10 resumes allowed per request"
-            )
-        
-        if len(request.resume_texts) != len(request.resume_filenames):
-            raise HTTPException(
-                status_code=400,
-                detail="Number of resume texts must match number of filenames"
-            )
-        
-        # Create AI provider if using AI
-        ai_provider = None
-        if use_ai:
-            try:
-                ai_provider = AIProviderFactory.create_provider(provider_type=provider, api_key=api_key)
-            except Exception as e:
-                logger.warning(f"Failed to initialize AI provider, using basic matching: {e}")
-                use_ai = False
-        
-        # Match resumes
-        results = await match_resumes(
-            resume_texts=request.resume_texts,
-            filenames=request.resume_filenames,
+
+        validate_matching_request(request)
+
+        return await run_resume_matching(
             job_description=request.job_description,
-            provider=ai_provider,
+            resume_texts=request.resume_texts,
+            resume_filenames=request.resume_filenames,
+            provider=provider,
             use_ai=use_ai,
-            required_skills=request.skills_keywords
+            api_key=api_key,
+            job_description_id=request.job_description_id,
+            skills_keywords=request.skills_keywords,
+            candidate_info=request.candidate_info
         )
-        
-        # Convert to response format
-        from app.models.resume import ResumeMatchResult
-        match_results = [
-            ResumeMatchResult(
-                filename=r['filename'],
-                score=r['score'],
-                missing_skills=r.get('missing_skills', []),
-                matching_skills=r.get('matching_skills', []),
-                remarks=r['remarks'],
-                extracted_text=r['extracted_text']
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error matching resumes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/resume-matching/match/stream")
+async def stream_match_resumes_with_jd(request: ResumeMatchingRequest, provider: str = "openai", use_ai: bool = True, api_key: str = None):
+    """
+    Match resumes against job description, streaming each result as a Server-Sent Event as soon as it is scored
+    """
+    logger.info(f"Streaming match of {len(request.resume_texts)} resumes with AI: {use_ai}")
+    validate_matching_request(request)
+
+    resume_texts, resume_filenames, candidate_info, skipped_files = drop_empty_resumes(
+        request.resume_texts, request.resume_filenames, request.candidate_info
+    )
+    ai_provider, use_ai = create_matching_provider(provider, use_ai, api_key)
+    draft_provider = create_draft_provider(provider, ai_provider, api_key)
+    extraction_provider = create_extraction_provider(ai_provider)
+
+    async def event_stream():
+        total = 0
+        try:
+            async for result in iter_and_save_matches(
+                resume_texts, resume_filenames, request.job_description, ai_provider, use_ai,
+                request.skills_keywords, request.job_description_id, candidate_info, draft_provider,
+                extraction_provider
+            ):
+                total += 1
+                yield f"data: {orjson.dumps(to_match_dict(result)).decode()}\n\n"
+        except Exception as e:
+            logger.exception(f"Error streaming resume matches: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+
+        summary = {"total_candidates": total, "skipped_files": skipped_files}
+        yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+async def extract_resume_text(file_path: str, filename: str, ocr: bool = False) -> str:
+    """Extract an uploaded resume's text, with optional OCR for PDFs without a text layer; empty on failure"""
+    extension = get_file_extension(filename)
+    try:
+        text = await extract_text_from_file(file_path, extension)
+        if ocr and extension.lower() == '.pdf' and len(text.strip()) < MIN_RESUME_TEXT_LENGTH:
+            logger.info(f"No text layer in {filename}, running OCR")
+            text = await run_extractor(extract_text_with_ocr, file_path)
+        return text
+    except ValueError as e:
+        logger.warning(f"Could not extract text from {filename}: {e}")
+        return ""
+
+
+@router.post("/resume-matching/match-files", response_model=ResumeMatchingResponse)
+async def match_resume_files_with_jd(
+    resumes: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    job_description_id: Optional[str] = Form(None),
+    provider: str = "openai",
+    use_ai: bool = True,
+    api_key: str = None,
+    ocr: bool = False
+):
+    """
+    Upload resume files (PDF or DOCX), extract their text server-side and match them against the job description.
+    Set ocr=true to run OCR on PDFs without a text layer (requires pytesseract).
+    """
+    try:
+        logger.info(f"Matching {len(resumes)} uploaded resumes with AI: {use_ai}")
+
+        if len(resumes) > MAX_RESUMES_PER_REQUEST:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {MAX_RESUMES_PER_REQUEST} resumes allowed per request"
             )
-            for r in results
-        ]
-        
-        # Get best match (first result, already sorted by score)
-        best_match = match_results[0] if match_results else None
-        
-        # Save candidates to MongoDB if job_description_id is provided
-        best_match_candidate_id = None
-        if request.job_description_id:
-            try:
-                # Save each candidate
-                candidate_ids = []
-                for i, result in enumerate(results):
-                    # Extract candidate info if provided
-                    candidate_name = "Unknown"
-                    candidate_email = "unknown@example.com"
-                    candidate_phone = None
-                    
-                    if request.candidate_info and i < len(request.candidate_info):
-                        candidate_info = request.candidate_info[i]
-                        candidate_name = candidate_info.get('name', candidate_name)
-                        candidate_email = candidate_info.get('email', candidate_email)
-                        candidate_phone = candidate_info.get('phone', candidate_phone)
-                    else:
-                        # Generate from filename
-                        candidate_name = result['filename'].split('.')[0].replace('_', ' ').title()
-                        candidate_email = f"{candidate_name.lower().replace(' ', '.')}@example.com"
-                    
-                    candidate_id = await mongodb_service.save_candidate(
-                        job_description_id=request.job_description_id,
-                        name=candidate_name,
-                        email=candidate_email,
-                        phone=candidate_phone,
-                        filename=result['filename'],
-                        matching_score=result['score'],
-                        matching_skills=result.get('matching_skills', []),
-                        missing_skills=result.get('missing_skills', []),
-                        remarks=result['remarks']
-                    )
-                    candidate_ids.append(candidate_id)
-                    
-                    # Store best match candidate ID
-                    if i == 0:
-                        best_match_candidate_id = candidate_id
-                
-                # Save matching session
-                await mongodb_service.save_matching_session(
-                    job_description_id=request.job_description_id,
-                    total_candidates=len(results),
-                    best_match_score=results[0]['score'] if results else 0,
-                    best_match_candidate_id=best_match_candidate_id
+
+        for resume in resumes:
+            if not validate_file_extension(resume.filename, ['.pdf', '.doc', '.docx']):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported file format for {resume.filename}. Please upload PDF, DOC, or DOCX files."
                 )
-                
-                logger.info(f"Saved {len(results)} candidates to MongoDB")
-                
-            except Exception as e:
-                logger.error(f"Error saving candidates to MongoDB: {e}")
-                # Don't fail the request if MongoDB save fails
-        
-        return ResumeMatchingResponse(
-            results=match_results,
-            best_match=best_match,
-            total_candidates=len(results)
+
+        # Uploads are read one by one; the files are then parsed in parallel worker processes
+        resume_filenames = [resume.filename for resume in resumes]
+        file_paths = [await stream_upload_to_temp(resume, resume.filename) for resume in resumes]
+        try:
+            resume_texts = await asyncio.gather(*(
+                extract_resume_text(file_path, filename, ocr)
+                for file_path, filename in zip(file_paths, resume_filenames)
+            ))
+        finally:
+            await asyncio.gather(*map(delete_file_async, file_paths))
+
+        return await run_resume_matching(
+            job_description=job_description,
+            resume_texts=resume_texts,
+            resume_filenames=resume_filenames,
+            provider=provider,
+            use_ai=use_ai,
+            api_key=api_key,
+            job_description_id=job_description_id
         )
-    
+
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Error matching resumes: {e}")
+        logger.exception(f"Error matching uploaded resumes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-
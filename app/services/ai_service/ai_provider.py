@@ -3,63 +3,219 @@ AI Provider with multi-model support (OpenAI, Gemini, Groq, Ollama)
 """
 import os
 import json
+import asyncio
+import hashlib
+import importlib.util
 from abc import ABC, abstractmethod
-from typing import Optional, Union, List, Dict, Any
+from typing import AsyncIterator, Awaitable, Callable, Optional, Union, List, Dict, Any, TypeVar
+import orjson
+from cachetools import LRUCache
 from dotenv import load_dotenv
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from app.utilities.json_utils import parse_json_response
 
 load_dotenv()
 
+# Opt-in for offline callers (offline=True): send OpenAI batches through the Batch API
+# (half price, but completes within a 24h window); HTTP endpoints never use it
+OPENAI_USE_BATCH_API = os.getenv("OPENAI_USE_BATCH_API", "false").lower() == "true"
+OPENAI_BATCH_POLL_SECONDS = float(os.getenv("OPENAI_BATCH_POLL_SECONDS", "10"))
+# Longest wait for the first chunk, and between chunks, of a streamed JSON response
+# (generate_json_cached); providers that don't stream deliver everything as the first chunk
+LLM_STREAM_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_TIMEOUT_SECONDS", "60"))
+# Process-wide bound on in-flight LLM requests, and retries of rate-limited or
+# transient failures with exponential backoff and jitter
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "30"))
+
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_RETRYABLE_STATUS_CODES = frozenset((408, 409, 429, 500, 502, 503, 504))
+# Connection errors of the OpenAI and Groq SDKs, which carry no status code
+_RETRYABLE_ERROR_NAMES = frozenset(("APIConnectionError", "APITimeoutError"))
+
+T = TypeVar("T")
+
+
+def json_response_format(kwargs: Dict[str, Any], structured: bool = False) -> Dict[str, Any]:
+    """response_format argument for OpenAI-compatible APIs when json_mode=True is requested; structured honours json_schema"""
+    if not kwargs.get("json_mode"):
+        return {}
+    if structured and kwargs.get("json_schema"):
+        return {"response_format": {"type": "json_schema", "json_schema": kwargs["json_schema"]}}
+    return {"response_format": {"type": "json_object"}}
+
+
+def ollama_json_format(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Ollama format argument when json_mode=True is requested: the json_schema's schema, else plain JSON"""
+    if not kwargs.get("json_mode"):
+        return {}
+    return {"format": kwargs["json_schema"]["schema"] if kwargs.get("json_schema") else "json"}
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Whether a provider error is transient (rate limit, timeout, 5xx) and worth retrying"""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or type(exc).__name__ in _RETRYABLE_ERROR_NAMES:
+        return True
+    # openai/groq APIStatusError and ollama ResponseError carry status_code, httpx errors a response
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in _RETRYABLE_STATUS_CODES
+
+
+async def call_with_retry(call_fn: Callable[[], Awaitable[T]]) -> T:
+    """Await call_fn() under the LLM concurrency bound, retrying transient errors with backoff"""
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(LLM_MAX_RETRIES),
+        wait=wait_exponential_jitter(initial=0.5, max=LLM_RETRY_MAX_DELAY_SECONDS),
+        retry=retry_if_exception(is_retryable_error),
+        reraise=True
+    ):
+        with attempt:
+            # Acquired per attempt, so a request backing off doesn't hold a slot
+            async with _llm_semaphore:
+                return await call_fn()
+
+
 class BaseAIProvider(ABC):
     """Base class for AI providers"""
     
     @abstractmethod
     async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
-        """Generate text from prompt"""
+        """Generate text from prompt; json_mode=True asks the provider for a bare JSON object, json_schema optionally constrains it"""
         pass
     
     @abstractmethod
     async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """Generate structured output using single LLM call"""
         pass
+    
+    async def generate_text_batch(self, prompts: List[Union[str, List[Dict[str, str]]]], offline: bool = False,
+                                  **kwargs) -> List[str]:
+        """Generate text for several prompts; concurrent generate_text calls unless the provider batches natively offline"""
+        return await asyncio.gather(*(
+            call_with_retry(lambda prompt=prompt: self.generate_text(prompt, **kwargs)) for prompt in prompts
+        ))
+    
+    async def generate_text_stream(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> AsyncIterator[str]:
+        """Yield the response text as it is generated; a single chunk unless the provider streams"""
+        yield await self.generate_text(prompt, **kwargs)
 
 
 class OpenAIProvider(BaseAIProvider):
-    """OpenAI GPT provider"""
+    """OpenAI GPT provider, or any OpenAI-compatible server (e.g. a local vLLM) via base_url"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini", base_url: Optional[str] = None):
+        # A custom server never receives the OpenAI key from the environment
+        self.api_key = api_key or ("EMPTY" if base_url else os.getenv("OPENAI_API_KEY"))
         self.model = model
+        self.base_url = base_url
         
         if not self.api_key:
             raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable or pass api_key parameter.")
         
         try:
             import openai
-            self.client = openai.OpenAI(api_key=self.api_key)
+            # Retries are left to call_with_retry, which backs off without holding a concurrency slot
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, base_url=base_url, max_retries=0)
         except ImportError:
             raise ImportError("openai package not installed")
     
     async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
-        import asyncio
-        
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
         else:
             messages = prompt
             
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=kwargs.get("temperature", 0.7),
-            max_tokens=kwargs.get("max_tokens", 2000)
+            max_tokens=kwargs.get("max_tokens", 2000),
+            **json_response_format(kwargs, structured=True)
         )
         return response.choices[0].message.content
     
-    async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        import asyncio
+    async def generate_text_stream(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> AsyncIterator[str]:
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens", 2000),
+            stream=True,
+            **json_response_format(kwargs, structured=True)
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+    
+    async def generate_text_batch(self, prompts: List[Union[str, List[Dict[str, str]]]], offline: bool = False,
+                                  **kwargs) -> List[str]:
+        """Generate text for several prompts as one OpenAI Batch API job for offline callers when OPENAI_USE_BATCH_API is set"""
+        # A batch job can take hours, so it is never polled inside an HTTP request; self-hosted
+        # OpenAI-compatible servers batch concurrent requests themselves
+        if not (offline and OPENAI_USE_BATCH_API) or self.base_url:
+            return await super().generate_text_batch(prompts, **kwargs)
+        
+        lines = [
+            orjson.dumps({
+                "custom_id": f"request-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt,
+                    "temperature": kwargs.get("temperature", 0.7),
+                    "max_tokens": kwargs.get("max_tokens", 2000),
+                    **json_response_format(kwargs, structured=True)
+                }
+            })
+            for i, prompt in enumerate(prompts)
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(OPENAI_BATCH_POLL_SECONDS)
+            batch = await self.client.batches.retrieve(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+        
+        output = await self.client.files.content(batch.output_file_id)
+        contents = {}
+        # Output lines are parsed straight from the response bytes
+        for line in output.content.splitlines():
+            if not line:
+                continue
+            item = orjson.loads(line)
+            if item.get("response") and item["response"].get("status_code") == 200:
+                contents[item["custom_id"]] = item["response"]["body"]["choices"][0]["message"]["content"]
+        
+        results = [contents.get(f"request-{i}") for i in range(len(prompts))]
         
+        # Requests that failed inside the batch are retried individually
+        missing = [i for i, result in enumerate(results) if result is None]
+        retried = await asyncio.gather(*(
+            call_with_retry(lambda i=i: self.generate_text(prompts[i], **kwargs)) for i in missing
+        ))
+        for i, result in zip(missing, retried):
+            results[i] = result
+        return results
+    
+    async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -67,8 +223,7 @@ class OpenAIProvider(BaseAIProvider):
             messages = prompt
             
         # Use OpenAI's structured output feature
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=kwargs.get("temperature", 0.7),
@@ -78,18 +233,16 @@ class OpenAIProvider(BaseAIProvider):
         
         content = response.choices[0].message.content
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback: try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            # orjson fast path, then a single-pass bracket scan for wrapped JSON
+            return parse_json_response(content)
+        except ValueError:
             raise ValueError(f"Failed to parse JSON response: {content}")
 
 
 class GeminiProvider(BaseAIProvider):
-    """Google Gemini provider"""
+    """Google Gemini provider (REST API over a pooled httpx client)"""
+    
+    API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
     
     def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.5-flash-lite"):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
@@ -99,58 +252,68 @@ class GeminiProvider(BaseAIProvider):
             raise ValueError("Gemini API key not provided. Set GEMINI_API_KEY environment variable or pass api_key parameter.")
         
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            self.client = genai.GenerativeModel(self.model)
+            import httpx
         except ImportError:
-            raise ImportError("google-generativeai package not installed")
-    
-    async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
-        # Handle both string and message list formats
-        if isinstance(prompt, str):
-            formatted_prompt = prompt
-        else:
-            # Convert message list to string format for Gemini
-            formatted_prompt = "\n".join([f"{msg['role'].upper()}: {msg['content']}" for msg in prompt])
+            raise ImportError("httpx package not installed")
         
-        response = await self.client.generate_content_async(
-            formatted_prompt,
-            generation_config={
+        # Kept for the provider's lifetime so calls reuse TLS connections; HTTP/2 when h2 is installed
+        self.client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(30.0, read=120.0),
+            headers={"x-goog-api-key": self.api_key}
+        )
+    
+    @staticmethod
+    def _request_body(prompt: Union[str, List[Dict[str, str]]], **kwargs) -> Dict[str, Any]:
+        """Gemini generateContent body; system messages become the system instruction"""
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+        body = {
+            "contents": [
+                {"role": "model" if msg["role"] == "assistant" else "user", "parts": [{"text": msg["content"]}]}
+                for msg in messages if msg["role"] != "system"
+            ],
+            "generationConfig": {
                 "temperature": kwargs.get("temperature", 0.7),
-                "max_output_tokens": kwargs.get("max_tokens", 2000)
+                "maxOutputTokens": kwargs.get("max_tokens", 2000)
             }
+        }
+        if kwargs.get("json_mode"):
+            body["generationConfig"]["responseMimeType"] = "application/json"
+        system = [msg["content"] for msg in messages if msg["role"] == "system"]
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": text} for text in system]}
+        return body
+    
+    async def _generate(self, body: Dict[str, Any]) -> str:
+        """POST a generateContent request and return the text of the first candidate"""
+        # Serialized and parsed with orjson (UTF-8 bytes in one pass) instead of httpx's stdlib json
+        response = await self.client.post(
+            self.API_URL.format(model=self.model),
+            content=orjson.dumps(body),
+            headers={"Content-Type": "application/json"}
         )
-        return response.text
+        response.raise_for_status()
+        candidates = orjson.loads(response.content).get("candidates") or []
+        if not candidates:
+            raise ValueError("Gemini returned no candidates")
+        return "".join(part.get("text", "") for part in candidates[0].get("content", {}).get("parts", []))
+    
+    async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
+        return await self._generate(self._request_body(prompt, **kwargs))
     
     async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        # Handle both string and message list formats
-        if isinstance(prompt, str):
-            formatted_prompt = prompt
-        else:
-            # Convert message list to string format for Gemini
-            formatted_prompt = "\n".join([f"{msg['role'].upper()}: {msg['content']}" for msg in prompt])
-        
         # Add JSON schema instruction to the prompt
         schema_instruction = f"\n\nPlease respond with a valid JSON object that matches this schema: {json.dumps(schema, indent=2)}"
-        formatted_prompt += schema_instruction
+        body = self._request_body(prompt, **kwargs)
+        body["contents"][-1]["parts"].append({"text": schema_instruction})
+        body["generationConfig"]["responseMimeType"] = "application/json"
         
-        response = await self.client.generate_content_async(
-            formatted_prompt,
-            generation_config={
-                "temperature": kwargs.get("temperature", 0.7),
-                "max_output_tokens": kwargs.get("max_tokens", 2000)
-            }
-        )
-        
-        content = response.text
+        content = await self._generate(body)
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback: try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            # orjson fast path, then a single-pass bracket scan for wrapped JSON
+            return parse_json_response(content)
+        except ValueError:
             raise ValueError(f"Failed to parse JSON response: {content}")
 
 
@@ -165,32 +328,46 @@ class GroqProvider(BaseAIProvider):
             raise ValueError("Groq API key not provided. Set GROQ_API_KEY environment variable or pass api_key parameter.")
         
         try:
-            from groq import Groq
-            self.client = Groq(api_key=self.api_key)
+            from groq import AsyncGroq
+            # Retries are left to call_with_retry, as for OpenAI
+            self.client = AsyncGroq(api_key=self.api_key, max_retries=0)
         except ImportError:
             raise ImportError("groq package not installed")
     
     async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
-        import asyncio
-        
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
         else:
             messages = prompt
             
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=kwargs.get("temperature", 0.7),
-            max_tokens=kwargs.get("max_tokens", 2000)
+            max_tokens=kwargs.get("max_tokens", 2000),
+            **json_response_format(kwargs)
         )
         return response.choices[0].message.content
     
+    async def generate_text_stream(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> AsyncIterator[str]:
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens", 2000),
+            stream=True,
+            **json_response_format(kwargs)
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+    
     async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        import asyncio
-        
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -201,8 +378,7 @@ class GroqProvider(BaseAIProvider):
         schema_instruction = f"\n\nPlease respond with a valid JSON object that matches this schema: {json.dumps(schema, indent=2)}"
         messages[-1]["content"] += schema_instruction
         
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=kwargs.get("temperature", 0.7),
@@ -211,13 +387,9 @@ class GroqProvider(BaseAIProvider):
         
         content = response.choices[0].message.content
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback: try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            # orjson fast path, then a single-pass bracket scan for wrapped JSON
+            return parse_json_response(content)
+        except ValueError:
             raise ValueError(f"Failed to parse JSON response: {content}")
 
 
@@ -229,23 +401,21 @@ class OllamaProvider(BaseAIProvider):
         self.model = model
         try:
             import ollama
-            self.client = ollama
+            self.client = ollama.AsyncClient(host=self.base_url)
         except ImportError:
             raise ImportError("ollama package not installed")
     
     async def generate_text(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> str:
-        import asyncio
-        
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
         else:
             messages = prompt
             
-        response = await asyncio.to_thread(
-            self.client.chat,
+        response = await self.client.chat(
             model=self.model,
             messages=messages,
+            **ollama_json_format(kwargs),
             options={
                 "temperature": kwargs.get("temperature", 0.7),
                 "num_predict": kwargs.get("max_tokens", 2000)
@@ -253,9 +423,26 @@ class OllamaProvider(BaseAIProvider):
         )
         return response["message"]["content"]
     
+    async def generate_text_stream(self, prompt: Union[str, List[Dict[str, str]]], **kwargs) -> AsyncIterator[str]:
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+        stream = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            **ollama_json_format(kwargs),
+            stream=True,
+            options={
+                "temperature": kwargs.get("temperature", 0.7),
+                "num_predict": kwargs.get("max_tokens", 2000)
+            }
+        )
+        try:
+            async for chunk in stream:
+                if chunk["message"]["content"]:
+                    yield chunk["message"]["content"]
+        finally:
+            await stream.aclose()
+    
     async def generate_structured(self, prompt: Union[str, List[Dict[str, str]]], schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        import asyncio
-        
         # Handle both string and message list formats
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -266,8 +453,7 @@ class OllamaProvider(BaseAIProvider):
         schema_instruction = f"\n\nPlease respond with a valid JSON object that matches this schema: {json.dumps(schema, indent=2)}"
         messages[-1]["content"] += schema_instruction
         
-        response = await asyncio.to_thread(
-            self.client.chat,
+        response = await self.client.chat(
             model=self.model,
             messages=messages,
             options={
@@ -278,21 +464,37 @@ class OllamaProvider(BaseAIProvider):
         
         content = response["message"]["content"]
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback: try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            # orjson fast path, then a single-pass bracket scan for wrapped JSON
+            return parse_json_response(content)
+        except ValueError:
             raise ValueError(f"Failed to parse JSON response: {content}")
 
 
 class AIProviderFactory:
     """Factory to create AI providers"""
     
-    @staticmethod
-    def create_provider(provider_type: str, **kwargs) -> BaseAIProvider:
+    # Environment variable each provider falls back to when no api_key is passed
+    API_KEY_ENV_VARS = {
+        "openai": "OPENAI_API_KEY",
+        "gemini": "GEMINI_API_KEY",
+        "groq": "GROQ_API_KEY"
+    }
+    
+    # Providers are reused across requests so their SDK clients keep one connection pool
+    _cache: LRUCache = LRUCache(maxsize=16)
+    
+    @classmethod
+    def _cache_key(cls, provider_type: str, filtered_kwargs: Dict[str, Any]) -> tuple:
+        """Cache key for a provider; the API key is hashed rather than stored"""
+        api_key = filtered_kwargs.get("api_key")
+        if not api_key and provider_type in cls.API_KEY_ENV_VARS:
+            api_key = os.getenv(cls.API_KEY_ENV_VARS[provider_type])
+        api_key_hash = hashlib.sha256(api_key.encode()).hexdigest() if api_key else None
+        options = tuple(sorted((k, v) for k, v in filtered_kwargs.items() if k != "api_key"))
+        return (provider_type, api_key_hash, options)
+    
+    @classmethod
+    def create_provider(cls, provider_type: str, **kwargs) -> BaseAIProvider:
         providers = {
             "openai": OpenAIProvider,
             "gemini": GeminiProvider,
@@ -300,18 +502,23 @@ class AIProviderFactory:
             "ollama": OllamaProvider
         }
         
-        if provider_type.lower() not in providers:
+        provider_type = provider_type.lower()
+        if provider_type not in providers:
             raise ValueError(f"Unknown provider: {provider_type}")
         
-        provider_class = providers[provider_type.lower()]
+        provider_class = providers[provider_type]
         
-        # Filter kwargs based on provider type
-        if provider_type.lower() == "ollama":
-            # Ollama only accepts base_url and model
-            filtered_kwargs = {k: v for k, v in kwargs.items() if k in ["base_url", "model"]}
-        else:
-            # Other providers accept api_key, model, and other common parameters
-            filtered_kwargs = {k: v for k, v in kwargs.items() if k in ["api_key", "model"]}
+        # Filter kwargs based on provider type; None means "use the default", so
+        # create_provider("openai") and create_provider("openai", api_key=None) share a cache entry
+        allowed = {
+            "ollama": ["base_url", "model"],
+            "openai": ["api_key", "model", "base_url"]
+        }.get(provider_type, ["api_key", "model"])
+        filtered_kwargs = {k: v for k, v in kwargs.items() if k in allowed and v is not None}
         
-        return provider_class(**filtered_kwargs)
-
+        key = cls._cache_key(provider_type, filtered_kwargs)
+        provider = cls._cache.get(key)
+        if provider is None:
+            provider = provider_class(**filtered_kwargs)
+            cls._cache[key] = provider
+        return provider
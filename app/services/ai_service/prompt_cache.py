@@ -0,0 +1,322 @@
+"""
+Prompt/response cache in front of AI provider calls
+"""
+import os
+import json
+import asyncio
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import orjson
+from cachetools import TTLCache
+
+from app.models.database import utc_now
+from app.services.ai_service.ai_provider import LLM_STREAM_TIMEOUT_SECONDS, call_with_retry
+from app.utilities.json_utils import parse_json_response, parse_json_stream
+from app.utilities.logger import setup_logger
+
+logger = setup_logger()
+
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "1024"))
+# After a MongoDB failure the database tier is skipped for this long, so an unreachable
+# server costs one server-selection timeout instead of two per cache miss
+PROMPT_CACHE_DB_RETRY_SECONDS = float(os.getenv("PROMPT_CACHE_DB_RETRY_SECONDS", "30"))
+
+# Cosine similarity needed for a semantic hit; 0 disables the semantic tier.
+# Off by default: personalized prompts (e.g. emails differing only by candidate
+# name) embed almost identically, so a semantic hit can return the wrong text.
+SEMANTIC_THRESHOLD = float(os.getenv("PROMPT_CACHE_SEMANTIC_THRESHOLD", "0"))
+SEMANTIC_MODEL_NAME = os.getenv("PROMPT_CACHE_SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+
+_memory_cache: TTLCache = TTLCache(maxsize=PROMPT_CACHE_MAX_ENTRIES, ttl=PROMPT_CACHE_TTL_SECONDS)
+# Semantic tier indexes per namespace, so e.g. match results never answer email prompts
+_semantic_vectors: Dict[str, Any] = {}
+_semantic_responses: Dict[str, List[str]] = {}
+_inflight: Dict[str, asyncio.Task] = {}
+_ttl_index_ready = False
+_db_retry_at = 0.0
+
+
+def cache_key(ai_provider, prompt, **kwargs) -> str:
+    """Build the exact-match cache key for a provider call"""
+    prompt_text = prompt if isinstance(prompt, str) else json.dumps(prompt, sort_keys=True)
+    key_text = "|".join([
+        type(ai_provider).__name__,
+        str(getattr(ai_provider, "model", "")),
+        json.dumps(kwargs, sort_keys=True, default=str),
+        prompt_text
+    ])
+    return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+
+def _collection():
+    """MongoDB collection backing the cache"""
+    from app.services.database_service import get_mongodb_service
+    return get_mongodb_service().db.prompt_cache
+
+
+def _db_available() -> bool:
+    """Whether the MongoDB tier is in use, i.e. not within PROMPT_CACHE_DB_RETRY_SECONDS of a failure"""
+    return time.monotonic() >= _db_retry_at
+
+
+def _db_failed(action: str, e: Exception):
+    """Log a MongoDB tier failure and skip the tier for PROMPT_CACHE_DB_RETRY_SECONDS"""
+    global _db_retry_at
+    _db_retry_at = time.monotonic() + PROMPT_CACHE_DB_RETRY_SECONDS
+    logger.warning(f"Prompt cache {action} failed, skipping the database for {PROMPT_CACHE_DB_RETRY_SECONDS}s: {e}")
+
+
+async def _load(key: str) -> Optional[str]:
+    """Look up a cached response in MongoDB"""
+    if not _db_available():
+        return None
+    try:
+        doc = await _collection().find_one({"_id": key}, {"response": 1})
+        return doc["response"] if doc else None
+    except Exception as e:
+        _db_failed("lookup", e)
+        return None
+
+
+async def _store(key: str, response: str):
+    """Persist a response in MongoDB, expiring via a TTL index"""
+    global _ttl_index_ready
+    if not _db_available():
+        return
+    try:
+        collection = _collection()
+        if not _ttl_index_ready:
+            await collection.create_index("created_at", expireAfterSeconds=PROMPT_CACHE_TTL_SECONDS)
+            _ttl_index_ready = True
+        await collection.replace_one(
+            {"_id": key},
+            {"_id": key, "response": response, "created_at": utc_now()},
+            upsert=True
+        )
+    except Exception as e:
+        _db_failed("store", e)
+
+
+@lru_cache(maxsize=1)
+def _embedder():
+    """Load the sentence embedding model; None when sentence-transformers is not installed"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("sentence-transformers not installed, semantic prompt cache disabled")
+        return None
+    return SentenceTransformer(SEMANTIC_MODEL_NAME)
+
+
+async def _embed(text: str):
+    """Embed text as a unit-norm vector (None when the tier is unavailable)"""
+    model = _embedder()
+    if model is None:
+        return None
+    return await asyncio.to_thread(model.encode, text, normalize_embeddings=True)
+
+
+def _semantic_lookup(vector, namespace: str, threshold: float) -> Optional[str]:
+    """Return the cached response of the most similar stored prompt in namespace above the threshold"""
+    vectors = _semantic_vectors.get(namespace)
+    if vector is None or vectors is None:
+        return None
+    similarities = vectors @ vector
+    best = int(similarities.argmax())
+    if similarities[best] >= threshold:
+        return _semantic_responses[namespace][best]
+    return None
+
+
+def _semantic_add(vector, response: str, namespace: str):
+    """Add a prompt embedding to the in-process index of namespace, dropping the oldest beyond capacity"""
+    import numpy as np
+
+    if vector is None:
+        return
+    row = vector.reshape(1, -1)
+    vectors = _semantic_vectors.get(namespace)
+    vectors = row if vectors is None else np.vstack([vectors, row])
+    responses = _semantic_responses.setdefault(namespace, [])
+    responses.append(response)
+    if len(responses) > PROMPT_CACHE_MAX_ENTRIES:
+        vectors = vectors[-PROMPT_CACHE_MAX_ENTRIES:]
+        del responses[:-PROMPT_CACHE_MAX_ENTRIES]
+    _semantic_vectors[namespace] = vectors
+
+
+def _is_valid(response: str, validate: Optional[Callable[[str], Any]]) -> bool:
+    """Whether response may be cached: validate(response) does not raise (always, without a validator)"""
+    if validate is None:
+        return True
+    try:
+        validate(response)
+        return True
+    except Exception as e:
+        logger.warning(f"Not caching response that failed validation: {e}")
+        return False
+
+
+async def _fill(key: str, call_fn: Callable[[], Awaitable[str]], semantic_text: Optional[str],
+                semantic_threshold: float, semantic_namespace: str,
+                validate: Optional[Callable[[str], Any]] = None, refresh: bool = False) -> str:
+    """Resolve a memory-cache miss from MongoDB, the semantic tier or call_fn(), caching a valid result"""
+    if not refresh:
+        response = await _load(key)
+        if response is not None:
+            logger.info("Prompt cache hit (database)")
+            _memory_cache[key] = response
+            return response
+
+    vector = None
+    if semantic_threshold > 0 and semantic_text:
+        vector = await _embed(semantic_text)
+        response = None if refresh else _semantic_lookup(vector, semantic_namespace, semantic_threshold)
+        if response is not None:
+            logger.info("Prompt cache hit (semantic)")
+            # Kept under the exact key too, so repeats of this prompt skip the embedding
+            _memory_cache[key] = response
+            return response
+
+    response = await call_fn()
+    if _is_valid(response, validate):
+        _memory_cache[key] = response
+        _semantic_add(vector, response, semantic_namespace)
+        await _store(key, response)
+    return response
+
+
+def _on_fill_done(key: str, task: asyncio.Task):
+    """Forget a finished in-flight lookup; retrieve its exception so it is never reported as unhandled"""
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+async def get_or_call(key: str, call_fn: Callable[[], Awaitable[str]], semantic_text: Optional[str] = None,
+                      semantic_threshold: Optional[float] = None, semantic_namespace: str = "prompt",
+                      validate: Optional[Callable[[str], Any]] = None, refresh: bool = False) -> str:
+    """Return the cached response for key, otherwise await call_fn() and cache its result
+
+    Only results for which validate(result) does not raise are cached. refresh skips the
+    cache lookup (e.g. a regenerate click) and replaces the entry with the new result.
+    """
+    if semantic_threshold is None:
+        semantic_threshold = SEMANTIC_THRESHOLD
+    if refresh:
+        return await _fill(key, call_fn, semantic_text, semantic_threshold, semantic_namespace, validate, refresh=True)
+    response = _memory_cache.get(key)
+    if response is not None:
+        logger.info("Prompt cache hit (memory)")
+        return response
+
+    # Single flight: concurrent identical prompts (e.g. a double-click) share one upstream call
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fill(key, call_fn, semantic_text, semantic_threshold, semantic_namespace, validate))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _on_fill_done(key, done))
+    else:
+        logger.info("Prompt cache hit (in flight)")
+    # Shielded so one caller disconnecting does not cancel the call for the others
+    return await asyncio.shield(task)
+
+
+class StreamStalledError(Exception):
+    """A streamed response produced no output within LLM_STREAM_TIMEOUT_SECONDS; not retried"""
+
+
+async def _with_idle_timeout(stream: AsyncIterator[str], timeout: float) -> AsyncIterator[str]:
+    """Yield the chunks of stream, raising StreamStalledError when the first or next chunk takes longer than timeout"""
+    while True:
+        try:
+            delta = await asyncio.wait_for(stream.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise StreamStalledError(f"No streamed output for {timeout}s") from None
+        yield delta
+
+
+def provider_namespace(ai_provider, kind: str = "prompt") -> str:
+    """Semantic tier namespace of kind for one provider and model, so one model never answers for another"""
+    return f"{kind}:{type(ai_provider).__name__}:{getattr(ai_provider, 'model', '')}"
+
+
+async def generate_text_cached(ai_provider, prompt, validate: Optional[Callable[[str], Any]] = None,
+                               refresh: bool = False, **kwargs) -> str:
+    """Call ai_provider.generate_text through the prompt cache; see get_or_call for validate and refresh"""
+    semantic_text = prompt if isinstance(prompt, str) else json.dumps(prompt)
+    return await get_or_call(
+        cache_key(ai_provider, prompt, **kwargs),
+        lambda: call_with_retry(lambda: ai_provider.generate_text(prompt, **kwargs)),
+        semantic_text=semantic_text,
+        semantic_namespace=provider_namespace(ai_provider),
+        validate=validate,
+        refresh=refresh
+    )
+
+
+async def generate_json_cached(ai_provider, prompt, semantic_text: Optional[str] = None,
+                               semantic_threshold: Optional[float] = None, semantic_namespace: Optional[str] = None,
+                               **kwargs) -> Dict[str, Any]:
+    """Generate a JSON object through the prompt cache; misses stream the response and stop once the object is complete"""
+    async def _stream() -> Dict[str, Any]:
+        stream = ai_provider.generate_text_stream(prompt, **kwargs)
+        try:
+            # Bounded per chunk, not in total, so long generations finish while a stalled stream
+            # frees its concurrency slot; a stall is not retryable, unlike provider timeouts
+            return await parse_json_stream(_with_idle_timeout(stream, LLM_STREAM_TIMEOUT_SECONDS))
+        finally:
+            await stream.aclose()
+
+    async def _call() -> str:
+        parsed = await call_with_retry(_stream)
+        # Stored as plain JSON under the same key as generate_text_cached, so both read each other's entries
+        return orjson.dumps(parsed).decode()
+
+    if semantic_text is None:
+        semantic_text = prompt if isinstance(prompt, str) else json.dumps(prompt)
+    if semantic_namespace is None:
+        semantic_namespace = provider_namespace(ai_provider)
+    response = await get_or_call(
+        cache_key(ai_provider, prompt, **kwargs), _call,
+        semantic_text=semantic_text,
+        semantic_threshold=semantic_threshold,
+        semantic_namespace=semantic_namespace
+    )
+    return parse_json_response(response)
+
+
+async def generate_text_batch_cached(ai_provider, prompts: List, offline: bool = False,
+                                     validate: Optional[Callable[[str], Any]] = None, **kwargs) -> List[str]:
+    """Call ai_provider.generate_text_batch for the prompts missing from the cache, in one batch; offline allows the OpenAI Batch API
+
+    Fresh responses are cached only if validate(response) does not raise, so a truncated
+    or refused response is returned to the caller but never served again from the cache.
+    """
+    keys = [cache_key(ai_provider, prompt, **kwargs) for prompt in prompts]
+    responses = [_memory_cache.get(key) for key in keys]
+
+    # Misses in memory are looked up in MongoDB concurrently
+    unseen = [i for i, response in enumerate(responses) if response is None]
+    for i, response in zip(unseen, await asyncio.gather(*(_load(keys[i]) for i in unseen))):
+        if response is not None:
+            _memory_cache[keys[i]] = response
+            responses[i] = response
+
+    missing = [i for i, response in enumerate(responses) if response is None]
+    if missing:
+        logger.info(f"Prompt cache: {len(prompts) - len(missing)}/{len(prompts)} batch hits")
+        fresh = await ai_provider.generate_text_batch([prompts[i] for i in missing], offline=offline, **kwargs)
+        valid = []
+        for i, response in zip(missing, fresh):
+            responses[i] = response
+            if _is_valid(response, validate):
+                _memory_cache[keys[i]] = response
+                valid.append(i)
+        await asyncio.gather(*(_store(keys[i], responses[i]) for i in valid))
+    return responses
@@ -2,29 +2,50 @@
 MongoDB service for database operations
 """
 import os
-from typing import List, Optional, Dict, Any
+import asyncio
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Set, Union
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo.errors import ConnectionFailure
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, DuplicateKeyError
 from bson import ObjectId
 
 from app.models.database import (
     JobDescriptionDocument, 
     CandidateDocument, 
-    MatchingSessionDocument
+    MatchingSessionDocument,
+    to_object_id,
+    as_object_id,
+    utc_now
 )
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 
+# Documents per cursor round trip (the server default first batch is 101)
+CURSOR_BATCH_SIZE = 1000
 
+# Documents per collection included in the data summary (totals are always exact)
+SUMMARY_RECENT_LIMIT = int(os.getenv("SUMMARY_RECENT_LIMIT", "50"))
+
+
+# Read methods return raw documents; ObjectId fields are serialized to
+# strings by MongoJSONResponse when the routers render them
 class MongoDBService:
     """MongoDB service for handling database operations"""
     
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
-        self.db: Optional[AsyncIOMotorDatabase] = None
-        self._connect()
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._pending_writes: Set[asyncio.Task] = set()
+    
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        """Database handle; the client is created on first use so it binds to the running event loop"""
+        if self._db is None:
+            self._connect()
+        return self._db
     
     def _connect(self):
         """Connect to MongoDB"""
@@ -32,8 +53,14 @@ class MongoDBService:
             mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
             database_name = os.getenv("MONGODB_DATABASE", "recruitment_app")
             
-            self.client = AsyncIOMotorClient(mongodb_url)
-            self.db = self.client[database_name]
+            # One long-lived pool shared by every request
+            self.client = AsyncIOMotorClient(
+                mongodb_url,
+                maxPoolSize=int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+                minPoolSize=int(os.getenv("MONGODB_MIN_POOL_SIZE", "5")),
+                serverSelectionTimeoutMS=int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+            )
+            self._db = self.client[database_name]
             
             logger.info(f"Connected to MongoDB: {database_name}")
             
@@ -41,10 +68,59 @@ class MongoDBService:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
+    async def connect(self):
+        """Warm up the connection pool so the first request does not pay DNS/TLS handshake latency"""
+        if self.client is None:
+            self._connect()
+        try:
+            await self.client.admin.command("ping")
+            logger.info("MongoDB ping succeeded")
+        except Exception as e:
+            logger.error(f"MongoDB ping failed: {e}")
+    
+    async def ensure_indexes(self):
+        """Create the indexes used by candidate and session lookups and the newest-first listings"""
+        try:
+            # Also serves job_description_id-only lookups (index prefix)
+            await self.db.candidates.create_index(
+                [("job_description_id", ASCENDING), ("matching_score", DESCENDING)]
+            )
+            await self.db.matching_sessions.create_index("job_description_id")
+            # get_all_* sort by created_at descending
+            await asyncio.gather(
+                self.db.job_descriptions.create_index([("created_at", DESCENDING)]),
+                self.db.candidates.create_index([("created_at", DESCENDING)]),
+                self.db.matching_sessions.create_index([("created_at", DESCENDING)])
+            )
+            logger.info("MongoDB indexes ensured")
+        except Exception as e:
+            logger.error(f"Error creating MongoDB indexes: {e}")
+    
+    def schedule_write(self, coro) -> asyncio.Task:
+        """Run a write in the background, keeping a reference until it completes"""
+        task = asyncio.create_task(coro)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+        return task
+    
+    def _on_write_done(self, task: asyncio.Task):
+        """Forget a finished background write and log its failure"""
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background write failed: {task.exception()}")
+    
+    async def drain_pending_writes(self):
+        """Wait for all background writes to finish"""
+        if self._pending_writes:
+            logger.info(f"Waiting for {len(self._pending_writes)} pending writes")
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+    
     async def close(self):
         """Close MongoDB connection"""
         if self.client:
             self.client.close()
+            self.client = None
+            self._db = None
             logger.info("MongoDB connection closed")
     
     # Job Description Operations
@@ -53,18 +129,21 @@ class MongoDBService:
         job_description: str, 
         source: str, 
         filename: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        job_description_id: Optional[str] = None
     ) -> str:
         """Save job description to MongoDB"""
         try:
+            ids = {"_id": ObjectId(job_description_id)} if job_description_id else {}
             doc = JobDescriptionDocument(
                 job_description=job_description,
                 source=source,
                 filename=filename,
-                metadata=metadata or {}
+                metadata={**(metadata or {}), "source": source},
+                **ids
             )
             
-            result = await self.db.job_descriptions.insert_one(doc.dict(by_alias=True))
+            result = await self.db.job_descriptions.insert_one(doc.model_dump(by_alias=True, exclude_none=True))
             logger.info(f"Job description saved with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -75,23 +154,17 @@ class MongoDBService:
     async def get_job_description(self, job_description_id: str) -> Optional[Dict[str, Any]]:
         """Get job description by ID"""
         try:
-            doc = await self.db.job_descriptions.find_one({"_id": ObjectId(job_description_id)})
-            if doc:
-                doc["_id"] = str(doc["_id"])
-            return doc
+            return await self.db.job_descriptions.find_one({"_id": to_object_id(job_description_id)})
         except Exception as e:
             logger.error(f"Error getting job description: {e}")
             return None
     
-    async def get_all_job_descriptions(self) -> List[Dict[str, Any]]:
-        """Get all job descriptions"""
+    async def get_all_job_descriptions(self, summary_only: bool = False) -> List[Dict[str, Any]]:
+        """Get all job descriptions; summary_only leaves out the (large) description text"""
         try:
-            cursor = self.db.job_descriptions.find().sort("created_at", -1)
-            docs = []
-            async for doc in cursor:
-                doc["_id"] = str(doc["_id"])
-                docs.append(doc)
-            return docs
+            projection = {"job_description": 0} if summary_only else None
+            cursor = self.db.job_descriptions.find({}, projection).sort("created_at", -1)
+            return await cursor.batch_size(CURSOR_BATCH_SIZE).to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting all job descriptions: {e}")
             return []
@@ -99,7 +172,7 @@ class MongoDBService:
     # Candidate Operations
     async def save_candidate(
         self,
-        job_description_id: str,
+        job_description_id: Union[str, ObjectId],
         name: str,
         email: str,
         phone: Optional[str],
@@ -107,12 +180,17 @@ class MongoDBService:
         matching_score: float,
         matching_skills: List[str],
         missing_skills: List[str],
-        remarks: str
+        remarks: str,
+        created_at: Optional[datetime] = None,
+        candidate_id: Optional[ObjectId] = None
     ) -> str:
         """Save candidate data to MongoDB"""
         try:
+            timestamps = {"created_at": created_at, "updated_at": created_at} if created_at else {}
+            ids = {"_id": candidate_id} if candidate_id else {}
             doc = CandidateDocument(
-                job_description_id=ObjectId(job_description_id),
+                **ids,
+                job_description_id=as_object_id(job_description_id),
                 name=name,
                 email=email,
                 phone=phone,
@@ -120,10 +198,11 @@ class MongoDBService:
                 matching_score=matching_score,
                 matching_skills=matching_skills,
                 missing_skills=missing_skills,
-                remarks=remarks
+                remarks=remarks,
+                **timestamps
             )
             
-            result = await self.db.candidates.insert_one(doc.dict(by_alias=True))
+            result = await self.db.candidates.insert_one(doc.model_dump(by_alias=True, exclude_none=True))
             logger.info(f"Candidate saved with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -131,33 +210,118 @@ class MongoDBService:
             logger.error(f"Error saving candidate: {e}")
             raise
     
+    @staticmethod
+    def new_object_ids(count: int, generated_at: datetime) -> List[ObjectId]:
+        """Generate count increasing ObjectIds (timestamp, process bytes, counter) from one urandom call"""
+        raw = os.urandom(8)
+        prefix = int(generated_at.timestamp()).to_bytes(4, "big") + raw[:5]
+        start = int.from_bytes(raw[5:], "big")
+        return [ObjectId(prefix + ((start + i) & 0xFFFFFF).to_bytes(3, "big")) for i in range(count)]
+
+    async def save_candidates(
+        self,
+        job_description_id: Union[str, ObjectId],
+        candidates: List[Dict[str, Any]],
+        created_at: Optional[datetime] = None,
+        candidate_ids: Optional[List[ObjectId]] = None
+    ) -> List[str]:
+        """Save several candidates of one job description with a single insert_many"""
+        if not candidates:
+            return []
+        try:
+            created_at = created_at or utc_now()
+            jd_oid = as_object_id(job_description_id)
+            ids = candidate_ids or self.new_object_ids(len(candidates), created_at)
+            docs = [
+                {
+                    "_id": oid,
+                    "job_description_id": jd_oid,
+                    "name": candidate["name"],
+                    "email": candidate["email"],
+                    "filename": candidate["filename"],
+                    "matching_score": candidate["matching_score"],
+                    "matching_skills": candidate.get("matching_skills", []),
+                    "missing_skills": candidate.get("missing_skills", []),
+                    "remarks": candidate["remarks"],
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    # Same shape as CandidateDocument.model_dump(exclude_none=True): no null phone
+                    **({"phone": candidate["phone"]} if candidate.get("phone") is not None else {})
+                }
+                for oid, candidate in zip(ids, candidates)
+            ]
+            
+            await self.db.candidates.insert_many(docs, ordered=False)
+            logger.info(f"Saved {len(docs)} candidates for job description {job_description_id}")
+            return [str(oid) for oid in ids]
+            
+        except Exception as e:
+            logger.error(f"Error saving candidates: {e}")
+            raise
+    
+    async def _save_candidates_individually(
+        self,
+        job_description_id: Union[str, ObjectId],
+        candidates: List[Dict[str, Any]],
+        candidate_ids: List[ObjectId],
+        created_at: datetime
+    ):
+        """Fallback when the bulk insert fails: insert each candidate concurrently, keeping its pre-generated ID"""
+        outcomes = await asyncio.gather(
+            *(
+                self.save_candidate(
+                    job_description_id=job_description_id,
+                    created_at=created_at,
+                    candidate_id=candidate_id,
+                    **candidate
+                )
+                for candidate, candidate_id in zip(candidates, candidate_ids)
+            ),
+            return_exceptions=True
+        )
+        # Duplicate-key failures are documents the partial bulk insert already wrote
+        failed = [
+            outcome for outcome in outcomes
+            if isinstance(outcome, Exception) and not isinstance(outcome, DuplicateKeyError)
+        ]
+        if failed:
+            logger.error(f"Failed to save {len(failed)} of {len(candidates)} candidates: {failed[0]}")
+            raise failed[0]
+    
+    async def save_candidates_with_fallback(
+        self,
+        job_description_id: Union[str, ObjectId],
+        candidates: List[Dict[str, Any]],
+        candidate_ids: List[ObjectId],
+        created_at: datetime
+    ) -> List[str]:
+        """Bulk insert candidates under pre-generated IDs, retrying them one by one if the bulk insert fails"""
+        try:
+            return await self.save_candidates(
+                job_description_id, candidates, created_at=created_at, candidate_ids=candidate_ids
+            )
+        except Exception:
+            await self._save_candidates_individually(job_description_id, candidates, candidate_ids, created_at)
+            return [str(oid) for oid in candidate_ids]
+    
     async def get_candidates_by_job_description(self, job_description_id: str) -> List[Dict[str, Any]]:
         """Get all candidates for a specific job description"""
         try:
             cursor = self.db.candidates.find(
-                {"job_description_id": ObjectId(job_description_id)}
+                {"job_description_id": to_object_id(job_description_id)}
             ).sort("matching_score", -1)
             
-            candidates = []
-            async for doc in cursor:
-                doc["_id"] = str(doc["_id"])
-                doc["job_description_id"] = str(doc["job_description_id"])
-                candidates.append(doc)
-            return candidates
+            return await cursor.batch_size(CURSOR_BATCH_SIZE).to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting candidates: {e}")
             return []
     
-    async def get_all_candidates(self) -> List[Dict[str, Any]]:
-        """Get all candidates"""
+    async def get_all_candidates(self, summary_only: bool = False) -> List[Dict[str, Any]]:
+        """Get all candidates; summary_only leaves out the AI remarks"""
         try:
-            cursor = self.db.candidates.find().sort("created_at", -1)
-            candidates = []
-            async for doc in cursor:
-                doc["_id"] = str(doc["_id"])
-                doc["job_description_id"] = str(doc["job_description_id"])
-                candidates.append(doc)
-            return candidates
+            projection = {"remarks": 0} if summary_only else None
+            cursor = self.db.candidates.find({}, projection).sort("created_at", -1)
+            return await cursor.batch_size(CURSOR_BATCH_SIZE).to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting all candidates: {e}")
             return []
@@ -165,21 +329,26 @@ class MongoDBService:
     # Matching Session Operations
     async def save_matching_session(
         self,
-        job_description_id: str,
+        job_description_id: Union[str, ObjectId],
         total_candidates: int,
         best_match_score: float,
-        best_match_candidate_id: Optional[str] = None
+        best_match_candidate_id: Optional[Union[str, ObjectId]] = None,
+        average_score: Optional[float] = None,
+        created_at: Optional[datetime] = None
     ) -> str:
         """Save matching session data"""
         try:
+            timestamps = {"created_at": created_at} if created_at else {}
             doc = MatchingSessionDocument(
-                job_description_id=ObjectId(job_description_id),
+                job_description_id=as_object_id(job_description_id),
                 total_candidates=total_candidates,
                 best_match_score=best_match_score,
-                best_match_candidate_id=ObjectId(best_match_candidate_id) if best_match_candidate_id else None
+                best_match_candidate_id=as_object_id(best_match_candidate_id) if best_match_candidate_id else None,
+                average_score=average_score,
+                **timestamps
             )
             
-            result = await self.db.matching_sessions.insert_one(doc.dict(by_alias=True))
+            result = await self.db.matching_sessions.insert_one(doc.model_dump(by_alias=True, exclude_none=True))
             logger.info(f"Matching session saved with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -191,14 +360,7 @@ class MongoDBService:
         """Get all matching sessions"""
         try:
             cursor = self.db.matching_sessions.find().sort("created_at", -1)
-            sessions = []
-            async for doc in cursor:
-                doc["_id"] = str(doc["_id"])
-                doc["job_description_id"] = str(doc["job_description_id"])
-                if doc.get("best_match_candidate_id"):
-                    doc["best_match_candidate_id"] = str(doc["best_match_candidate_id"])
-                sessions.append(doc)
-            return sessions
+            return await cursor.batch_size(CURSOR_BATCH_SIZE).to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting matching sessions: {e}")
             return []
@@ -207,29 +369,50 @@ class MongoDBService:
     async def get_job_description_with_candidates(self, job_description_id: str) -> Optional[Dict[str, Any]]:
         """Get job description with all its candidates"""
         try:
-            job_desc = await self.get_job_description(job_description_id)
-            if not job_desc:
-                return None
-            
-            candidates = await self.get_candidates_by_job_description(job_description_id)
-            job_desc["candidates"] = candidates
-            
-            return job_desc
+            # Single round-trip: join candidates server-side, best match first
+            pipeline = [
+                {"$match": {"_id": to_object_id(job_description_id)}},
+                {"$lookup": {
+                    "from": "candidates",
+                    "localField": "_id",
+                    "foreignField": "job_description_id",
+                    "pipeline": [{"$sort": {"matching_score": -1}}],
+                    "as": "candidates"
+                }}
+            ]
+            docs = await self.db.job_descriptions.aggregate(pipeline).to_list(length=1)
+            return docs[0] if docs else None
         except Exception as e:
             logger.error(f"Error getting job description with candidates: {e}")
             return None
     
+    async def _count_and_recent(self, collection, exclude: Optional[Dict[str, int]] = None):
+        """Total document count plus the newest documents of a collection in one $facet round trip"""
+        recent = [{"$sort": {"created_at": -1}}, {"$limit": SUMMARY_RECENT_LIMIT}]
+        if exclude:
+            recent.append({"$project": exclude})
+        pipeline = [{"$facet": {"total": [{"$count": "n"}], "recent": recent}}]
+        result = (await collection.aggregate(pipeline).to_list(length=1))[0]
+        total = result["total"][0]["n"] if result["total"] else 0
+        return total, result["recent"]
+    
     async def get_all_data_summary(self) -> Dict[str, Any]:
-        """Get summary of all data"""
+        """Get summary of all data: exact totals and the most recent documents per collection"""
         try:
-            job_descriptions = await self.get_all_job_descriptions()
-            candidates = await self.get_all_candidates()
-            sessions = await self.get_matching_sessions()
+            (
+                (total_job_descriptions, job_descriptions),
+                (total_candidates, candidates),
+                (total_sessions, sessions)
+            ) = await asyncio.gather(
+                self._count_and_recent(self.db.job_descriptions),
+                self._count_and_recent(self.db.candidates, exclude={"remarks": 0}),
+                self._count_and_recent(self.db.matching_sessions)
+            )
             
             return {
-                "total_job_descriptions": len(job_descriptions),
-                "total_candidates": len(candidates),
-                "total_sessions": len(sessions),
+                "total_job_descriptions": total_job_descriptions,
+                "total_candidates": total_candidates,
+                "total_sessions": total_sessions,
                 "job_descriptions": job_descriptions,
                 "candidates": candidates,
                 "sessions": sessions
@@ -239,5 +422,7 @@ class MongoDBService:
             return {}
 
 
-# Global MongoDB service instance
-mongodb_service = MongoDBService()
+@lru_cache(maxsize=1)
+def get_mongodb_service() -> MongoDBService:
+    """Shared MongoDB service, created on first use instead of at import"""
+    return MongoDBService()
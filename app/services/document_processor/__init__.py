@@ -1,18 +1,49 @@
 """
 Document processor for extracting text from various file formats
 """
-from .pdf_extractor import extract_text_from_pdf
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable
+
+from .pdf_extractor import extract_text_from_pdf, extract_text_with_ocr
 from .docx_extractor import extract_text_from_docx
 
+# Worker processes for CPU-bound parsing (default: one per core)
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", "0")) or os.cpu_count()
+
+# Extension -> extractor; add new formats here
+_EXTRACTORS = {
+    '.pdf': extract_text_from_pdf,
+    '.doc': extract_text_from_docx,
+    '.docx': extract_text_from_docx,
+}
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ProcessPoolExecutor:
+    """Process pool for extraction, created on first use"""
+    # spawn: workers must not inherit the server's event loop and MongoDB/HTTP client threads
+    return ProcessPoolExecutor(max_workers=DOCUMENT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
 
-def extract_text_from_file(file_path: str, file_extension: str) -> str:
+def shutdown_executor():
+    """Stop the extraction worker processes, if they were started"""
+    if _executor.cache_info().currsize:
+        _executor().shutdown(wait=False, cancel_futures=True)
+        _executor.cache_clear()
+
+
+async def run_extractor(extractor: Callable[[str], str], file_path: str) -> str:
+    """Run a synchronous extractor in the process pool so parsing neither blocks the event loop nor holds the GIL"""
+    return await asyncio.get_running_loop().run_in_executor(_executor(), extractor, file_path)
+
+
+async def extract_text_from_file(file_path: str, file_extension: str) -> str:
     """Extract text from file based on extension"""
-    extension_lower = file_extension.lower()
-    
-    if extension_lower == '.pdf':
-        return extract_text_from_pdf(file_path)
-    elif extension_lower in ['.doc', '.docx']:
-        return extract_text_from_docx(file_path)
-    else:
+    extractor = _EXTRACTORS.get(file_extension.lower())
+    if extractor is None:
         raise ValueError(f"Unsupported file format: {file_extension}")
-
+    return await run_extractor(extractor, file_path)
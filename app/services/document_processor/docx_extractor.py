@@ -1,22 +1,68 @@
 """
 DOCX text extraction service
 """
+import zipfile
+from functools import lru_cache
 from typing import BinaryIO
-from docx import Document
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH, _TEXT, _TAB, _BREAK, _CARRIAGE_RETURN = (
+    f"{_W}p", f"{_W}t", f"{_W}tab", f"{_W}br", f"{_W}cr"
+)
+_DOCUMENT_TAGS = (_PARAGRAPH, _TEXT, _TAB, _BREAK, _CARRIAGE_RETURN)
+
+
+@lru_cache(maxsize=1)
+def _document_class():
+    """Import python-docx on first use to keep application startup light"""
+    from docx import Document
+    return Document
+
+
+@lru_cache(maxsize=1)
+def _etree():
+    """lxml.etree, or None when lxml is not installed"""
+    try:
+        from lxml import etree
+        return etree
+    except ImportError:
+        return None
+
+
+def _extract_with_lxml(etree, file_path: str) -> str:
+    """Stream word/document.xml and collect paragraph text without building the python-docx object model"""
+    paragraphs = []
+    current = []
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        for _, element in etree.iterparse(xml, events=("end",), tag=_DOCUMENT_TAGS):
+            tag = element.tag
+            if tag == _TEXT:
+                current.append(element.text or "")
+            elif tag == _TAB:
+                current.append("\t")
+            elif tag != _PARAGRAPH:
+                current.append("\n")
+            else:
+                # Skip the empty spacer paragraphs common in resume templates
+                if current:
+                    paragraphs.append("".join(current))
+                    current = []
+            element.clear()
+    return "\n".join(paragraphs).strip()
+
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX file"""
     try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        etree = _etree()
+        if etree is not None:
+            return _extract_with_lxml(etree, file_path)
+        doc = _document_class()(file_path)
+        # Skip the empty spacer paragraphs common in resume templates
+        return "\n".join(p.text for p in doc.paragraphs if p.text).strip()
     except Exception as e:
         logger.error(f"Error extracting text from DOCX: {e}")
         raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
-
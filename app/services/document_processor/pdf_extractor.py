@@ -1,23 +1,96 @@
 """
 PDF text extraction service
 """
-from typing import BinaryIO
-import PyPDF2
+import gc
+import importlib
+from functools import lru_cache
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 
+# Page count above which the PyPDF2 object graph is collected eagerly
+LARGE_PDF_PAGE_COUNT = 50
+
+# Render scale for OCR (1.0 = 72 dpi); ~300 dpi keeps tesseract accurate
+OCR_RENDER_SCALE = 300 / 72
+
+
+@lru_cache(maxsize=None)
+def _load_module(name: str):
+    """Import an optional library once; None when it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def _extract_with_pdfium(pdfium, file_path: str) -> str:
+    """Extract text with pypdfium2 (PDFium, Chrome's PDF engine)"""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return "\n".join(pdf[i].get_textpage().get_text_range() for i in range(len(pdf)))
+    finally:
+        pdf.close()
+
+
+def _extract_with_pymupdf(fitz, file_path: str) -> str:
+    """Extract text with PyMuPDF"""
+    with fitz.open(file_path) as doc:
+        return "\n".join(page.get_text() for page in doc)
+
+
+def _extract_with_pypdf2(PyPDF2, file_path: str) -> str:
+    """Extract text with the pure-Python PyPDF2 parser"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        parts = [page.extract_text() or "" for page in pdf_reader.pages]
+    text = "\n".join(parts)
+
+    # PyPDF2 leaves a large object graph behind on long documents
+    if len(parts) > LARGE_PDF_PAGE_COUNT:
+        del pdf_reader, parts
+        gc.collect()
+    return text
+
+
+# Fastest first; a backend is skipped when its package is not installed
+_PDF_BACKENDS = (
+    ("pypdfium2", _extract_with_pdfium),
+    ("fitz", _extract_with_pymupdf),
+    ("PyPDF2", _extract_with_pypdf2),
+)
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     """Extract text from PDF file"""
     try:
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+        for module_name, backend in _PDF_BACKENDS:
+            module = _load_module(module_name)
+            if module is not None:
+                return backend(module, file_path).strip()
+        raise ImportError("No PDF library installed (pypdfium2, PyMuPDF or PyPDF2)")
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
+
+def extract_text_with_ocr(file_path: str) -> str:
+    """Extract text from a scanned PDF by running tesseract OCR on rendered pages"""
+    pdfium = _load_module("pypdfium2")
+    pytesseract = _load_module("pytesseract")
+    if pdfium is None or pytesseract is None:
+        raise ValueError("OCR requires pypdfium2 and pytesseract to be installed")
+
+    try:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            parts = [
+                pytesseract.image_to_string(pdf[i].render(scale=OCR_RENDER_SCALE).to_pil())
+                for i in range(len(pdf))
+            ]
+        finally:
+            pdf.close()
+        return "\n".join(parts).strip()
+    except Exception as e:
+        logger.error(f"Error running OCR on PDF: {e}")
+        raise ValueError(f"Failed to OCR PDF: {str(e)}")
@@ -1,10 +1,45 @@
 """
 Email generation service for interview and rejection emails
 """
+import re
+
 from app.utilities.logger import setup_logger
 
 logger = setup_logger()
 
+_SUBJECT_RE = re.compile(r'SUBJECT:\s*(.+)')
+_BODY_RE = re.compile(r'BODY:\s*(.+?)(?=\n\n|\Z)', re.DOTALL)
+
+# Fallback emails when the AI call fails: (subject, body) templates per email type
+_FALLBACK_TEMPLATES = {
+    "interview": (
+        "Interview Opportunity at {company_name}",
+        """Dear {name},
+
+Thank you for your interest in our position. We were impressed with your background and would like to invite you for an interview.
+
+We believe your skills and experience align well with what we're looking for. Please let us know your availability for a call.
+
+Best regards,
+{hiring_manager_name}
+{company_name}"""
+    ),
+    "rejection": (
+        "Update on Your Application to {company_name}",
+        """Dear {name},
+
+Thank you for your interest in our position and for taking the time to apply.
+
+After careful consideration, we have decided to move forward with another candidate whose qualifications more closely match our current needs.
+
+We appreciate your interest and wish you success in your job search.
+
+Best regards,
+{hiring_manager_name}
+{company_name}"""
+    ),
+}
+
 
 async def generate_email(provider, candidate_info: dict, job_description: str, 
                          email_type: str, company_name: str = "Our Company",
@@ -58,9 +93,8 @@ BODY:
         response = await provider.generate_text(prompt, temperature=0.7)
         
         # Parse response
-        import re
-        subject_match = re.search(r'SUBJECT:\s*(.+)', response)
-        body_match = re.search(r'BODY:\s*(.+?)(?=\n\n|\Z)', response, re.DOTALL)
+        subject_match = _SUBJECT_RE.search(response)
+        body_match = _BODY_RE.search(response)
         
         subject = subject_match.group(1).strip() if subject_match else "Interview Opportunity" if email_type == "interview" else "Update on Your Application"
         body = body_match.group(1).strip() if body_match else response
@@ -75,30 +109,14 @@ BODY:
     except Exception as e:
         logger.error(f"Error generating email: {e}")
         # Return template email
-        if email_type == "interview":
-            subject = f"Interview Opportunity at {company_name}"
-            body = f"""Dear {candidate_info['name']},
-
-Thank you for your interest in our position. We were impressed with your background and would like to invite you for an interview.
-
-We believe your skills and experience align well with what we're looking for. Please let us know your availability for a call.
-
-Best regards,
-{hiring_manager_name}
-{company_name}"""
-        else:
-            subject = f"Update on Your Application to {company_name}"
-            body = f"""Dear {candidate_info['name']},
-
-Thank you for your interest in our position and for taking the time to apply.
-
-After careful consideration, we have decided to move forward with another candidate whose qualifications more closely match our current needs.
-
-We appreciate your interest and wish you success in your job search.
-
-Best regards,
-{hiring_manager_name}
-{company_name}"""
+        subject_template, body_template = _FALLBACK_TEMPLATES["interview" if email_type == "interview" else "rejection"]
+        fields = {
+            "name": candidate_info['name'],
+            "hiring_manager_name": hiring_manager_name,
+            "company_name": company_name
+        }
+        subject = subject_template.format(**fields)
+        body = body_template.format(**fields)
         
         return {
             'email_subject': subject,
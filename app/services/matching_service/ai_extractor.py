@@ -1,91 +1,230 @@
 """
 AI-based information extraction from resumes and job descriptions with JSON output
 """
-import json
+import os
+import copy
 import re
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+import orjson
+from cachetools import LRUCache
+from app.services.ai_service.prompt_cache import generate_json_cached, generate_text_batch_cached, provider_namespace
+from app.utilities.json_utils import parse_json_response
 from app.utilities.logger import setup_logger
 from app.utilities.prompts import (
+    EXTRACT_RESUME_INFORMATION_SYSTEM,
     EXTRACT_RESUME_INFORMATION,
+    EXTRACT_JD_INFORMATION_SYSTEM,
     EXTRACT_JD_INFORMATION,
-    INTELLIGENT_MATCH
+    INTELLIGENT_MATCH_SYSTEM,
+    INTELLIGENT_MATCH,
+    RESUME_JSON_SCHEMA,
+    JD_JSON_SCHEMA,
+    MATCH_JSON_SCHEMA,
+    build_messages
 )
 
 logger = setup_logger()
 
+# Parsed AI extractions keyed by provider, model and text hash, so a JD or
+# resume seen again skips the prompt cache lookup and the JSON parsing
+_extraction_cache: LRUCache = LRUCache(maxsize=256)
 
-def clean_json_response(response: str) -> str:
-    """Clean JSON response from AI models (remove markdown, extra text)"""
-    cleaned = response.strip()
-    
-    # Remove markdown code blocks
-    if "```json" in cleaned:
-        cleaned = cleaned.split("```json")[1].split("```")[0].strip()
-    elif "```" in cleaned:
-        cleaned = cleaned.split("```")[1].split("```")[0].strip()
-    
-    # Try to extract JSON if there's extra text
-    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if json_match:
-        cleaned = json_match.group()
-    
-    return cleaned
+# Cosine similarity of (resume summary, JD summary) at which a previous match
+# result is reused without an LLM call; 0 disables it. Off by default: the
+# reused remarks describe the earlier candidate.
+MATCH_SEMANTIC_THRESHOLD = float(os.getenv("MATCH_SEMANTIC_THRESHOLD", "0"))
+
+# Draft-then-verify cascade: a draft score at least this far from 50, with few
+# missing skills, is accepted without asking the main matching model
+MATCH_DRAFT_MARGIN = 30
+MATCH_DRAFT_MAX_MISSING_SKILLS = 3
+
+# Resumes in a recognised export layout (see _TEMPLATE_EXTRACTORS) are parsed
+# by regex without an LLM call. Off by default: the fields are coarser.
+RESUME_TEMPLATE_EXTRACTION = os.getenv("RESUME_TEMPLATE_EXTRACTION", "false").lower() == "true"
+
+# Resume sentences sent to the matching model as evidence instead of raw text
+MATCH_EVIDENCE_SENTENCES = 5
+MATCH_EVIDENCE_MAX_CHARS = 500
+
+# Regex fallbacks, compiled once at import
+_SPLIT_RE = re.compile(r'[,;|]')
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_RE = re.compile(r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}')
+_SKILLS_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'SKILLS[:.]?\s*([^\n]+)',
+    r'TECHNICAL SKILLS[:.]?\s*([^\n]+)',
+    r'CORE COMPETENCIES[:.]?\s*([^\n]+)'
+)]
+_EXPERIENCE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)',
+    r'experience[:.]?\s*(\d+)\s*(?:\+)?\s*(?:years?|yrs?)'
+)]
+_EDUCATION_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(Bachelor|Master|PhD|B\.?Tech|M\.?Tech|B\.?Sc|M\.?Sc|MBA)[^\n]*',
+    r'(BE|ME|MS|BS)\s+(?:in\s+)?[^\n]+'
+)]
+_JD_TITLE_RE = re.compile(r'^([A-Z][^\n]{10,60})', re.MULTILINE)
+_JD_REQUIRED_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:required|must have|essential)[\s:]?(?:skills?|qualifications?)[:.]?\s*([^\n]+)',
+    r'requirements?[:.]?\s*([^\n]+)'
+)]
+_JD_NICE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:nice to have|preferred|bonus)[\s:]?(?:skills?|qualifications?)[:.]?\s*([^\n]+)',
+    r'preferred?[:.]?\s*([^\n]+)'
+)]
+_YEARS_RE = re.compile(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)', re.IGNORECASE)
+# Sentence ends are punctuation followed by whitespace, or line breaks, so
+# "Node.js", "B.Tech" and "3.5 years" stay whole; tokens keep short and symbol
+# skills such as C, R, C++, C# and Node.js
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_TOKEN_RE = re.compile(r'[A-Za-z][\w+#.]*')
+_PAGE_MARKER_RE = re.compile(r'^Page \d+ of \d+$')
+_LINKEDIN_DATES_RE = re.compile(r'^[A-Z][a-z]+ \d{4} - (?:Present|[A-Z][a-z]+ \d{4})(?: \((?:(\d+) years?)?\s*(?:(\d+) months?)?\))?$')
+_LINKEDIN_DEGREE_RE = re.compile(r'^(.*?)\s*·\s*\(.*?(\d{4})\)\s*$')
+
+
+def flatten_resume_info(resume_info: Dict) -> Dict:
+    """Flatten the nested resume extraction JSON for easier use"""
+    return {
+        'name': resume_info.get('personal_info', {}).get('name', 'Not specified'),
+        'email': resume_info.get('personal_info', {}).get('email', 'Not specified'),
+        'phone': resume_info.get('personal_info', {}).get('phone', 'Not specified'),
+        'location': resume_info.get('personal_info', {}).get('location', 'Not specified'),
+        'skills': resume_info.get('skills', {}).get('technical_skills', []),
+        'soft_skills': resume_info.get('skills', {}).get('soft_skills', []),
+        'certifications': resume_info.get('skills', {}).get('certifications', []),
+        'experience_years': resume_info.get('experience', {}).get('total_years', 0),
+        'relevant_experience': resume_info.get('experience', {}).get('relevant_experience', ''),
+        'companies': resume_info.get('experience', {}).get('companies', []),
+        'roles': resume_info.get('experience', {}).get('roles', []),
+        'education': resume_info.get('education', {}).get('highest_degree', 'Not specified'),
+        'university': resume_info.get('education', {}).get('university', 'Not specified'),
+        'graduation_year': resume_info.get('education', {}).get('year', 'Not specified'),
+        'summary': resume_info.get('professional_summary', ''),
+        'strengths': resume_info.get('strengths', [])
+    }
+
+
+def _extraction_key(kind: str, provider, text: str) -> Tuple[str, str, str, str]:
+    """Cache key of an AI extraction of text"""
+    return (
+        kind,
+        type(provider).__name__,
+        str(getattr(provider, "model", "")),
+        hashlib.sha256(text.encode("utf-8")).hexdigest()
+    )
+
+
+def _cached_extraction(key: Tuple[str, str, str, str]) -> Optional[Dict]:
+    """Copy of a cached extraction, so callers can't mutate the cached dict"""
+    cached = _extraction_cache.get(key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def parse_resume_info_response(response: str, resume_text: str, cache_key: Optional[Tuple] = None) -> Dict:
+    """Parse a resume extraction response, falling back to keyword extraction on failure"""
+    try:
+        resume_info = flatten_resume_info(parse_json_response(response))
+        if cache_key:
+            # Only successful AI extractions are cached, never the fallback
+            _extraction_cache[cache_key] = copy.deepcopy(resume_info)
+        return resume_info
+    except orjson.JSONDecodeError as e:
+        logger.error(f"JSON parse error in resume extraction: {e}")
+        logger.error(f"Response was: {response[:500]}")
+        return extract_resume_info_fallback(resume_text)
+    except Exception as e:
+        logger.error(f"Error extracting resume info with AI: {e}")
+        return extract_resume_info_fallback(resume_text)
 
 
 async def extract_resume_info_ai(resume_text: str, provider) -> Dict:
     """Extract structured information from resume using AI with JSON output"""
+    template_info = extract_resume_info_template(resume_text)
+    if template_info is not None:
+        return template_info
+    
+    key = _extraction_key("resume", provider, resume_text)
+    cached = _cached_extraction(key)
+    if cached is not None:
+        return cached
     
-    prompt = EXTRACT_RESUME_INFORMATION.format(resume_text=resume_text)
+    prompt = build_messages(EXTRACT_RESUME_INFORMATION_SYSTEM, EXTRACT_RESUME_INFORMATION.format(resume_text=resume_text))
     
     try:
-        response = await provider.generate_text(prompt, temperature=0.2)
-        
-        # Clean and parse response
-        cleaned = clean_json_response(response)
-        resume_info = json.loads(cleaned)
-        
-        # Flatten structure for easier use
-        return {
-            'name': resume_info.get('personal_info', {}).get('name', 'Not specified'),
-            'email': resume_info.get('personal_info', {}).get('email', 'Not specified'),
-            'phone': resume_info.get('personal_info', {}).get('phone', 'Not specified'),
-            'location': resume_info.get('personal_info', {}).get('location', 'Not specified'),
-            'skills': resume_info.get('skills', {}).get('technical_skills', []),
-            'soft_skills': resume_info.get('skills', {}).get('soft_skills', []),
-            'certifications': resume_info.get('skills', {}).get('certifications', []),
-            'experience_years': resume_info.get('experience', {}).get('total_years', 0),
-            'relevant_experience': resume_info.get('experience', {}).get('relevant_experience', ''),
-            'companies': resume_info.get('experience', {}).get('companies', []),
-            'roles': resume_info.get('experience', {}).get('roles', []),
-            'education': resume_info.get('education', {}).get('highest_degree', 'Not specified'),
-            'university': resume_info.get('education', {}).get('university', 'Not specified'),
-            'graduation_year': resume_info.get('education', {}).get('year', 'Not specified'),
-            'summary': resume_info.get('professional_summary', ''),
-            'strengths': resume_info.get('strengths', [])
-        }
-    except json.JSONDecodeError as e:
+        resume_info = flatten_resume_info(await generate_json_cached(
+            provider, prompt, temperature=0.2, json_mode=True, json_schema=RESUME_JSON_SCHEMA
+        ))
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse error in resume extraction: {e}")
-        logger.error(f"Response was: {response[:500]}")
+        logger.error(f"Response was: {e.doc[:500]}")
         return extract_resume_info_fallback(resume_text)
     except Exception as e:
         logger.error(f"Error extracting resume info with AI: {e}")
         return extract_resume_info_fallback(resume_text)
+    _extraction_cache[key] = copy.deepcopy(resume_info)
+    return resume_info
+
+
+async def extract_resume_infos_ai(resume_texts: List[str], provider, offline: bool = False) -> List[Dict]:
+    """Extract several resumes with one provider batch; offline scripts may use a single Batch API job"""
+    keys = [_extraction_key("resume", provider, resume_text) for resume_text in resume_texts]
+    results = [
+        extract_resume_info_template(resume_text) or _cached_extraction(key)
+        for resume_text, key in zip(resume_texts, keys)
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+    
+    prompts = [
+        build_messages(EXTRACT_RESUME_INFORMATION_SYSTEM, EXTRACT_RESUME_INFORMATION.format(resume_text=resume_texts[i]))
+        for i in missing
+    ]
+    try:
+        responses = await generate_text_batch_cached(
+            provider, prompts, offline=offline, validate=parse_json_response,
+            temperature=0.2, json_mode=True, json_schema=RESUME_JSON_SCHEMA
+        )
+    except Exception as e:
+        logger.error(f"Batch resume extraction failed, extracting individually: {e}")
+        responses = None
+    
+    if responses is None:
+        extracted = await asyncio.gather(*(extract_resume_info_ai(resume_texts[i], provider) for i in missing))
+    else:
+        extracted = [
+            parse_resume_info_response(response, resume_texts[i], keys[i])
+            for response, i in zip(responses, missing)
+        ]
+    for i, resume_info in zip(missing, extracted):
+        results[i] = resume_info
+    return results
 
 
 async def extract_jd_info_ai(job_description: str, provider) -> Dict:
     """Extract structured information from job description using AI with JSON output"""
+    key = _extraction_key("jd", provider, job_description)
+    cached = _cached_extraction(key)
+    if cached is not None:
+        return cached
     
-    prompt = EXTRACT_JD_INFORMATION.format(job_description=job_description)
+    prompt = build_messages(EXTRACT_JD_INFORMATION_SYSTEM, EXTRACT_JD_INFORMATION.format(job_description=job_description))
     
     try:
-        response = await provider.generate_text(prompt, temperature=0.2)
-        
-        # Clean and parse response
-        cleaned = clean_json_response(response)
-        jd_info = json.loads(cleaned)
+        # Streamed on a cache miss and parsed as soon as the JSON object is complete
+        jd_info = await generate_json_cached(
+            provider, prompt, temperature=0.2, json_mode=True, json_schema=JD_JSON_SCHEMA
+        )
         
         # Flatten structure for easier use
-        return {
+        extracted = {
             'job_title': jd_info.get('job_title', 'Not specified'),
             'required_skills': jd_info.get('requirements', {}).get('required_skills', []),
             'nice_to_have_skills': jd_info.get('requirements', {}).get('nice_to_have_skills', []),
@@ -97,17 +236,70 @@ async def extract_jd_info_ai(job_description: str, provider) -> Dict:
             'location': jd_info.get('company_info', {}).get('location', 'Not specified'),
             'employment_type': jd_info.get('company_info', {}).get('employment_type', 'Not specified')
         }
-    except json.JSONDecodeError as e:
+        _extraction_cache[key] = copy.deepcopy(extracted)
+        return extracted
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse error in JD extraction: {e}")
-        logger.error(f"Response was: {response[:500]}")
+        logger.error(f"Response was: {e.doc[:500]}")
         return extract_jd_info_fallback(job_description)
     except Exception as e:
         logger.error(f"Error extracting JD info with AI: {e}")
         return extract_jd_info_fallback(job_description)
 
 
-async def intelligent_match(extracted_resume: Dict, extracted_jd: Dict, provider, resume_text: str, jd_text: str) -> Dict:
-    """Use AI to perform intelligent matching with structured JSON output"""
+def _tokens(text: str) -> List[str]:
+    """Lowercased word and skill tokens of text, without sentence-final periods"""
+    return [token.rstrip('.') for token in _TOKEN_RE.findall(text.lower())]
+
+
+def select_evidence_snippets(resume_text: str, required_skills: List[str]) -> str:
+    """Top resume sentences by TF-IDF weight of the JD's required-skill tokens, in resume order"""
+    sentences = [s.strip() for s in _SENTENCE_RE.split(resume_text) if s.strip()]
+    skill_tokens = set(_tokens(' '.join(required_skills)))
+    if not sentences or not skill_tokens:
+        return resume_text[:MATCH_EVIDENCE_MAX_CHARS]
+
+    # Smoothed IDF and L2-normalised TF-IDF per sentence, as TfidfVectorizer computes them
+    counts = [Counter(_tokens(sentence)) for sentence in sentences]
+    doc_freq = Counter(token for count in counts for token in count)
+    idf = {token: math.log((1 + len(sentences)) / (1 + df)) + 1 for token, df in doc_freq.items()}
+    scores = []
+    for i, count in enumerate(counts):
+        norm = math.sqrt(sum((tf * idf[token]) ** 2 for token, tf in count.items())) or 1.0
+        score = sum(tf * idf[token] for token, tf in count.items() if token in skill_tokens) / norm
+        if score > 0:
+            scores.append((score, i))
+    if not scores:
+        return resume_text[:MATCH_EVIDENCE_MAX_CHARS]
+
+    chosen = []
+    total = 0
+    for _, i in sorted(scores, reverse=True)[:MATCH_EVIDENCE_SENTENCES]:
+        if total + len(sentences[i]) > MATCH_EVIDENCE_MAX_CHARS and chosen:
+            continue
+        chosen.append(i)
+        total += len(sentences[i])
+    return '\n'.join(sentences[i][:MATCH_EVIDENCE_MAX_CHARS] for i in sorted(chosen))
+
+
+async def _draft_match(draft_provider, prompt) -> Optional[Dict]:
+    """Cheap-model match result if it is clear-cut enough to skip the main model, else None"""
+    try:
+        draft = await generate_json_cached(
+            draft_provider, prompt, temperature=0, json_mode=True, json_schema=MATCH_JSON_SCHEMA
+        )
+        score = float(draft.get('score', 50))
+    except Exception as e:
+        logger.warning(f"Draft matching failed, using the main model: {e}")
+        return None
+    if abs(score - 50) > MATCH_DRAFT_MARGIN and len(draft.get('missing_skills', [])) < MATCH_DRAFT_MAX_MISSING_SKILLS:
+        return draft
+    return None
+
+
+async def intelligent_match(extracted_resume: Dict, extracted_jd: Dict, provider, resume_text: str, jd_text: str,
+                            draft_provider=None) -> Dict:
+    """Use AI to perform intelligent matching with structured JSON output; borderline drafts of draft_provider are verified by provider"""
     
     # Create concise summaries
     resume_summary = f"""
@@ -127,19 +319,23 @@ Nice-to-Have: {', '.join(extracted_jd.get('nice_to_have_skills', [])[:5])}
 Location: {extracted_jd.get('location', 'N/A')}
 """
     
-    prompt = INTELLIGENT_MATCH.format(
+    prompt = build_messages(INTELLIGENT_MATCH_SYSTEM, INTELLIGENT_MATCH.format(
         resume_summary=resume_summary,
         jd_summary=jd_summary,
-        resume_text=resume_text[:1500],
-        jd_text=jd_text[:1500]
-    )
+        evidence_snippets=select_evidence_snippets(resume_text, extracted_jd.get('required_skills', []))
+    ))
     
     try:
-        response = await provider.generate_text(prompt, temperature=0.3)
-        
-        # Clean and parse response
-        cleaned = clean_json_response(response)
-        match_result = json.loads(cleaned)
+        match_result = await _draft_match(draft_provider, prompt) if draft_provider else None
+        if match_result is None:
+            # Streamed on a cache miss and parsed as soon as the JSON object is complete
+            match_result = await generate_json_cached(
+                provider, prompt, temperature=0.3, json_mode=True, json_schema=MATCH_JSON_SCHEMA,
+                # Near-identical profile pairs can share a result; indexed per provider model
+                semantic_text=resume_summary + jd_summary,
+                semantic_threshold=MATCH_SEMANTIC_THRESHOLD,
+                semantic_namespace=provider_namespace(provider, "intelligent_match")
+            )
         
         # Ensure score is within bounds
         score = float(match_result.get('score', 50))
@@ -153,9 +349,9 @@ Location: {extracted_jd.get('location', 'N/A')}
             'weaknesses': match_result.get('weaknesses', []),
             'remarks': match_result.get('remarks', 'Analysis completed.')
         }
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse error in matching: {e}")
-        logger.error(f"Response was: {response[:500]}")
+        logger.error(f"Response was: {e.doc[:500]}")
         return calculate_basic_score(resume_text, jd_text, extracted_jd.get('required_skills', []))
     except Exception as e:
         logger.error(f"AI matching error: {e}")
@@ -184,49 +380,33 @@ def extract_resume_info_fallback(resume_text: str) -> Dict:
     }
     
     # Extract email
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', resume_text)
+    email_match = _EMAIL_RE.search(resume_text)
     if email_match:
         info['email'] = email_match.group()
     
     # Extract phone
-    phone_match = re.search(r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}', resume_text)
+    phone_match = _PHONE_RE.search(resume_text)
     if phone_match:
         info['phone'] = phone_match.group()
     
     # Extract skills using common patterns
-    skills_patterns = [
-        r'SKILLS[:.]?\s*([^\n]+)',
-        r'TECHNICAL SKILLS[:.]?\s*([^\n]+)',
-        r'CORE COMPETENCIES[:.]?\s*([^\n]+)'
-    ]
-    
-    for pattern in skills_patterns:
-        match = re.search(pattern, resume_text, re.IGNORECASE)
+    for pattern in _SKILLS_RES:
+        match = pattern.search(resume_text)
         if match:
-            skills = [s.strip() for s in re.split(r'[,;|]', match.group(1))]
+            skills = [s.strip() for s in _SPLIT_RE.split(match.group(1))]
             info['skills'] = [s for s in skills if s and len(s) > 2][:10]
             break
     
     # Extract experience years
-    exp_patterns = [
-        r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)',
-        r'experience[:.]?\s*(\d+)\s*(?:\+)?\s*(?:years?|yrs?)'
-    ]
-    
-    for pattern in exp_patterns:
-        match = re.search(pattern, resume_text, re.IGNORECASE)
+    for pattern in _EXPERIENCE_RES:
+        match = pattern.search(resume_text)
         if match:
             info['experience_years'] = int(match.group(1))
             break
     
     # Extract education
-    edu_patterns = [
-        r'(Bachelor|Master|PhD|B\.?Tech|M\.?Tech|B\.?Sc|M\.?Sc|MBA)[^\n]*',
-        r'(BE|ME|MS|BS)\s+(?:in\s+)?[^\n]+'
-    ]
-    
-    for pattern in edu_patterns:
-        match = re.search(pattern, resume_text, re.IGNORECASE)
+    for pattern in _EDUCATION_RES:
+        match = pattern.search(resume_text)
         if match:
             info['education'] = match.group().strip()
             break
@@ -234,6 +414,109 @@ def extract_resume_info_fallback(resume_text: str) -> Dict:
     return info
 
 
+_LINKEDIN_HEADERS = frozenset((
+    "Contact", "Top Skills", "Languages", "Certifications", "Honors-Awards",
+    "Publications", "Patents", "Summary", "Experience", "Education"
+))
+
+
+def _linkedin_sections(lines: List[str]) -> Dict[str, List[str]]:
+    """Lines of a LinkedIn PDF export grouped under their section headers"""
+    sections: Dict[str, List[str]] = {"": []}
+    current = ""
+    for line in lines:
+        if line in _LINKEDIN_HEADERS:
+            current = line
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line)
+    return sections
+
+
+def extract_linkedin_export(resume_text: str) -> Dict:
+    """Regex extraction of a LinkedIn "Save to PDF" profile export"""
+    info = extract_resume_info_fallback(resume_text)
+    lines = [line.strip() for line in resume_text.splitlines()]
+    lines = [line for line in lines if line and not _PAGE_MARKER_RE.match(line)]
+    
+    # Name, headline and location are the three lines before the first main
+    # section; cut them out so they aren't read as part of the sidebar above
+    for header in ("Summary", "Experience", "Education"):
+        if header in lines:
+            start = lines.index(header)
+            if start >= 3:
+                info['name'], info['location'] = lines[start - 3], lines[start - 1]
+                lines = lines[:start - 3] + lines[start:]
+            break
+    sections = _linkedin_sections(lines)
+    
+    info['skills'] = sections.get("Top Skills", [])[:10]
+    info['certifications'] = sections.get("Certifications", [])
+    info['summary'] = " ".join(sections.get("Summary", []))
+    
+    # Each position is "Company / Title / dates (duration)"
+    experience = sections.get("Experience", [])
+    months = 0
+    for i, line in enumerate(experience):
+        match = _LINKEDIN_DATES_RE.match(line)
+        if not match:
+            continue
+        months += int(match.group(1) or 0) * 12 + int(match.group(2) or 0)
+        if i >= 1 and experience[i - 1] not in info['roles']:
+            info['roles'].append(experience[i - 1])
+        if i >= 2 and experience[i - 2] not in info['companies']:
+            info['companies'].append(experience[i - 2])
+    if months:
+        info['experience_years'] = months // 12
+    info['roles'] = info['roles'][:3]
+    info['companies'] = info['companies'][:3]
+    
+    # First school: "University / Degree, Field · (start - end)"
+    education = sections.get("Education", [])
+    info['education'] = 'Not specified'
+    if education:
+        info['university'] = education[0]
+        if len(education) > 1:
+            degree = _LINKEDIN_DEGREE_RE.match(education[1])
+            info['education'] = degree.group(1) if degree else education[1]
+            if degree:
+                info['graduation_year'] = degree.group(2)
+    
+    return info
+
+
+# Known resume export layouts: fingerprint -> regex extractor returning the
+# extract_resume_info_ai schema. Only layouts with fixed machine-generated
+# headers belong here; free-form templates still go to the LLM.
+_TEMPLATE_EXTRACTORS: Dict[str, Callable[[str], Dict]] = {
+    "linkedin": extract_linkedin_export,
+}
+
+
+def detect_template(resume_text: str) -> Optional[str]:
+    """Fingerprint of a known export layout from the resume header, or None"""
+    # Fingerprinted on the fixed section headers of the layout rather than a
+    # hash of the header text, which contains the candidate's own details
+    header = resume_text[:600]
+    if header.lstrip().startswith("Contact") and "linkedin.com/in/" in header and "Top Skills" in resume_text:
+        return "linkedin"
+    return None
+
+
+def extract_resume_info_template(resume_text: str) -> Optional[Dict]:
+    """Regex extraction for resumes in a known export layout when enabled, else None"""
+    if not RESUME_TEMPLATE_EXTRACTION:
+        return None
+    template = detect_template(resume_text)
+    if template is None:
+        return None
+    try:
+        return _TEMPLATE_EXTRACTORS[template](resume_text)
+    except Exception as e:
+        logger.warning(f"Template extraction ({template}) failed, using AI extraction: {e}")
+        return None
+
+
 def extract_jd_info_fallback(job_description: str) -> Dict:
     """Fallback method for extracting JD info using regex"""
     info = {
@@ -250,44 +533,64 @@ def extract_jd_info_fallback(job_description: str) -> Dict:
     }
     
     # Extract job title (usually first line or heading)
-    title_match = re.search(r'^([A-Z][^\n]{10,60})', job_description, re.MULTILINE)
+    title_match = _JD_TITLE_RE.search(job_description)
     if title_match:
         info['job_title'] = title_match.group(1).strip()
     
     # Extract required skills
-    req_patterns = [
-        r'(?:required|must have|essential)[\s:]?(?:skills?|qualifications?)[:.]?\s*([^\n]+)',
-        r'requirements?[:.]?\s*([^\n]+)'
-    ]
-    
-    for pattern in req_patterns:
-        match = re.search(pattern, job_description, re.IGNORECASE)
+    for pattern in _JD_REQUIRED_RES:
+        match = pattern.search(job_description)
         if match:
-            skills = [s.strip() for s in re.split(r'[,;|]', match.group(1))]
+            skills = [s.strip() for s in _SPLIT_RE.split(match.group(1))]
             info['required_skills'] = [s for s in skills if s and len(s) > 2][:10]
             break
     
     # Extract nice-to-have skills
-    nice_patterns = [
-        r'(?:nice to have|preferred|bonus)[\s:]?(?:skills?|qualifications?)[:.]?\s*([^\n]+)',
-        r'preferred?[:.]?\s*([^\n]+)'
-    ]
-    
-    for pattern in nice_patterns:
-        match = re.search(pattern, job_description, re.IGNORECASE)
+    for pattern in _JD_NICE_RES:
+        match = pattern.search(job_description)
         if match:
-            skills = [s.strip() for s in re.split(r'[,;|]', match.group(1))]
+            skills = [s.strip() for s in _SPLIT_RE.split(match.group(1))]
             info['nice_to_have_skills'] = [s for s in skills if s and len(s) > 2][:10]
             break
     
     # Extract experience years
-    exp_match = re.search(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)', job_description, re.IGNORECASE)
+    exp_match = _EXPERIENCE_RES[0].search(job_description)
     if exp_match:
         info['experience_years'] = int(exp_match.group(1))
     
     return info
 
 
+@lru_cache(maxsize=1)
+def _ahocorasick():
+    """pyahocorasick module, or None when it is not installed"""
+    try:
+        import ahocorasick
+        return ahocorasick
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _skill_automaton(skills: Tuple[str, ...]):
+    """Aho-Corasick automaton over lowercased skills, memoized since one JD's skills recur across resumes"""
+    automaton = _ahocorasick().Automaton()
+    for skill in skills:
+        automaton.add_word(skill, skill)
+    automaton.make_automaton()
+    return automaton
+
+
+def find_skills(text_lower: str, skills: List[str]) -> FrozenSet[str]:
+    """Lowercased skills occurring as substrings of text_lower, in one pass when pyahocorasick is installed"""
+    keys = tuple(sorted({skill.lower() for skill in skills if skill}))
+    if not keys:
+        return frozenset()
+    if _ahocorasick() is None:
+        return frozenset(key for key in keys if key in text_lower)
+    return frozenset(found for _, found in _skill_automaton(keys).iter(text_lower))
+
+
 def calculate_basic_score(resume_text: str, jd_text: str, required_skills: List[str] = None) -> Dict:
     """Fallback basic scoring method using keyword matching"""
     if not required_skills:
@@ -297,8 +600,9 @@ def calculate_basic_score(resume_text: str, jd_text: str, required_skills: List[
     jd_lower = jd_text.lower()
     
     # Match skills
-    matched_skills = [skill for skill in required_skills if skill.lower() in resume_lower]
-    missing_skills = [skill for skill in required_skills if skill.lower() not in resume_lower]
+    found = find_skills(resume_lower, required_skills)
+    matched_skills = [skill for skill in required_skills if not skill or skill.lower() in found]
+    missing_skills = [skill for skill in required_skills if skill and skill.lower() not in found]
     
     # Calculate base score from skills
     if required_skills:
@@ -307,8 +611,8 @@ def calculate_basic_score(resume_text: str, jd_text: str, required_skills: List[
         skill_score = 50
     
     # Extract and compare experience
-    exp_match_resume = re.search(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)', resume_text, re.IGNORECASE)
-    exp_match_jd = re.search(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)', jd_text, re.IGNORECASE)
+    exp_match_resume = _YEARS_RE.search(resume_text)
+    exp_match_jd = _YEARS_RE.search(jd_text)
     
     exp_score = 0
     if exp_match_resume and exp_match_jd:
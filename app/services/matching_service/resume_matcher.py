@@ -2,79 +2,160 @@
 Resume matching service using AI to evaluate candidates with intelligent extraction
 """
 import re
-from typing import List
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 from app.utilities.logger import setup_logger
 from app.services.matching_service.ai_extractor import (
     extract_resume_info_ai, 
+    extract_resume_infos_ai,
     extract_jd_info_ai, 
     intelligent_match
 )
 
 logger = setup_logger()
 
+# Concurrent per-resume matching calls, to stay within provider rate limits
+MATCH_CONCURRENCY = 8
 
-async def match_resumes(resume_texts: List[str], filenames: List[str], job_description: str, 
-                        provider=None, use_ai: bool = True, required_skills: List[str] = None) -> List[dict]:
-    """Match multiple resumes against job description using AI-based extraction"""
-    
-    results = []
-    
-    # Extract JD information once
-    jd_info = {}
+
+def summarize_scores(results: List[dict]) -> Tuple[int, float, float]:
+    """Return (best index, best score, average score) of match results in a single pass"""
+    best_idx, best_score, total = -1, 0.0, 0.0
+    for i, result in enumerate(results):
+        score = result['score']
+        total += score
+        if best_idx == -1 or score > best_score:
+            best_idx, best_score = i, score
+    average = total / len(results) if results else 0.0
+    return best_idx, best_score, average
+
+
+async def extract_jd_context(job_description: str, provider=None, use_ai: bool = True) -> dict:
+    """Extract job description information once per matching run"""
     if use_ai and provider:
         try:
             logger.info("Extracting job description information with AI...")
-            jd_info = await extract_jd_info_ai(job_description, provider)
+            return await extract_jd_info_ai(job_description, provider)
         except Exception as e:
             logger.error(f"Error extracting JD info: {e}")
-    
-    # Match each resume
-    for idx, (resume_text, filename) in enumerate(zip(resume_texts, filenames)):
-        logger.info(f"Matching resume {idx + 1}/{len(resume_texts)}: {filename}")
-        
-        try:
-            if use_ai and provider:
-                # AI-based extraction and matching
-                resume_info = await extract_resume_info_ai(resume_text, provider)
-                
-                # Perform intelligent matching
-                match_result = await intelligent_match(
-                    resume_info, 
-                    jd_info, 
-                    provider,
-                    resume_text,
-                    job_description
-                )
-            else:
-                # Fallback to basic scoring
-                from app.services.matching_service.ai_extractor import calculate_basic_score
-                jd_required_skills = jd_info.get('required_skills', required_skills or [])
-                match_result = calculate_basic_score(resume_text, job_description, jd_required_skills)
-            
-            results.append({
-                'filename': filename,
-                'score': match_result['score'],
-                'missing_skills': match_result.get('missing_skills', []),
-                'matching_skills': match_result.get('matching_skills', []),
-                'remarks': match_result.get('remarks', 'No remarks available.'),
-                'extracted_text': resume_text[:1000],  # First 1000 chars
-                'resume_info': resume_info if use_ai and provider else None  # Include extracted resume info
-            })
+    return {}
+
+
+async def match_single_resume(resume_text: str, filename: str, job_description: str, jd_info: dict,
+                              provider=None, use_ai: bool = True, required_skills: List[str] = None,
+                              resume_info: Optional[dict] = None, draft_provider=None,
+                              extraction_provider=None) -> dict:
+    """Match one resume against the job description; errors yield a zero-score result"""
+    try:
+        if use_ai and provider:
+            # AI-based extraction (unless already extracted in a batch) and matching
+            if resume_info is None:
+                resume_info = await extract_resume_info_ai(resume_text, extraction_provider or provider)
             
-        except Exception as e:
-            logger.error(f"Error matching resume {filename}: {e}")
-            # Add result with error
-            results.append({
-                'filename': filename,
-                'score': 0,
-                'missing_skills': [],
-                'matching_skills': [],
-                'remarks': f'Error processing resume: {str(e)}',
-                'extracted_text': resume_text[:500]
-            })
+            # Perform intelligent matching
+            match_result = await intelligent_match(
+                resume_info, 
+                jd_info, 
+                provider,
+                resume_text,
+                job_description,
+                draft_provider=draft_provider
+            )
+        else:
+            # Fallback to basic scoring
+            from app.services.matching_service.ai_extractor import calculate_basic_score
+            jd_required_skills = jd_info.get('required_skills', required_skills or [])
+            match_result = calculate_basic_score(resume_text, job_description, jd_required_skills)
+        
+        return {
+            'filename': filename,
+            'score': match_result['score'],
+            'missing_skills': match_result.get('missing_skills', []),
+            'matching_skills': match_result.get('matching_skills', []),
+            'remarks': match_result.get('remarks', 'No remarks available.'),
+            'extracted_text': resume_text[:1000],  # First 1000 chars
+            'resume_info': resume_info if use_ai and provider else None  # Include extracted resume info
+        }
+        
+    except Exception as e:
+        logger.error(f"Error matching resume {filename}: {e}")
+        # Add result with error
+        return {
+            'filename': filename,
+            'score': 0,
+            'missing_skills': [],
+            'matching_skills': [],
+            'remarks': f'Error processing resume: {str(e)}',
+            'extracted_text': resume_text[:500]
+        }
+
+
+async def match_resumes(resume_texts: List[str], filenames: List[str], job_description: str, 
+                        provider=None, use_ai: bool = True, required_skills: List[str] = None,
+                        draft_provider=None, extraction_provider=None) -> List[dict]:
+    """Match multiple resumes against job description using AI-based extraction"""
+    # Extraction can run on a separate (e.g. local) model; matching stays on provider
+    extraction_provider = extraction_provider or provider
+    
+    # Extract JD information once
+    jd_info = await extract_jd_context(job_description, extraction_provider, use_ai)
+    
+    # Extract all resumes in one provider batch
+    if use_ai and provider:
+        resume_infos = await extract_resume_infos_ai(resume_texts, extraction_provider)
+    else:
+        resume_infos = [None] * len(resume_texts)
+    
+    # Match resumes concurrently; match_single_resume turns errors into zero-score results
+    sem = asyncio.Semaphore(MATCH_CONCURRENCY)
+    
+    async def _process(idx: int, resume_text: str, filename: str, resume_info: Optional[dict]) -> dict:
+        async with sem:
+            logger.info(f"Matching resume {idx + 1}/{len(resume_texts)}: {filename}")
+            return await match_single_resume(
+                resume_text, filename, job_description, jd_info, provider, use_ai, required_skills,
+                resume_info=resume_info, draft_provider=draft_provider
+            )
+    
+    results = list(await asyncio.gather(*(
+        _process(idx, resume_text, filename, resume_info)
+        for idx, (resume_text, filename, resume_info) in enumerate(zip(resume_texts, filenames, resume_infos))
+    )))
     
     # Sort by score
     results.sort(key=lambda x: x['score'], reverse=True)
     
     return results
 
+
+async def _indexed(index: int, coro, sem: asyncio.Semaphore) -> Tuple[int, dict]:
+    """Await coro under sem and tag its result with the input position"""
+    try:
+        async with sem:
+            return index, await coro
+    finally:
+        # Cancelled while queued on sem: close the never-started coroutine
+        coro.close()
+
+
+async def iter_match_results(resume_texts: List[str], filenames: List[str], job_description: str,
+                             provider=None, use_ai: bool = True, required_skills: List[str] = None,
+                             draft_provider=None, extraction_provider=None) -> AsyncIterator[Tuple[int, dict]]:
+    """Match resumes concurrently, yielding (input index, result) as soon as each completes"""
+    jd_info = await extract_jd_context(job_description, extraction_provider or provider, use_ai)
+    
+    sem = asyncio.Semaphore(MATCH_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_indexed(index, match_single_resume(
+            resume_text, filename, job_description, jd_info, provider, use_ai, required_skills,
+            draft_provider=draft_provider, extraction_provider=extraction_provider
+        ), sem))
+        for index, (resume_text, filename) in enumerate(zip(resume_texts, filenames))
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client disconnected mid-stream: stop the remaining LLM calls
+        for task in tasks:
+            task.cancel()
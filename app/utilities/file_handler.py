@@ -2,24 +2,31 @@
 File handling utilities for document processing
 """
 import os
+import asyncio
 import tempfile
 from pathlib import Path
-from typing import BinaryIO, Optional
+from typing import Optional
 
 logger = __import__("logging").getLogger(__name__)
 
+# Chunk size for streaming uploads to disk (stream_upload_to_temp); 1 MiB keeps a typical
+# resume to one or two write syscalls (and aiofiles thread hops) instead of dozens
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def stream_upload_to_temp(upload, filename: str) -> str:
+    """Stream an uploaded file (FastAPI UploadFile) to a unique temporary file in chunks"""
+    import aiofiles.tempfile
 
-def save_uploaded_file(uploaded_file: BinaryIO, filename: str) -> str:
-    """Save uploaded file to temporary directory"""
     temp_dir = Path(tempfile.gettempdir()) / "recruitment_uploads"
     temp_dir.mkdir(exist_ok=True)
-    
-    file_path = temp_dir / filename
-    
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.read())
-    
-    return str(file_path)
+
+    async with aiofiles.tempfile.NamedTemporaryFile(
+        "wb", delete=False, dir=temp_dir, suffix=get_file_extension(filename)
+    ) as temp_file:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            await temp_file.write(chunk)
+        return temp_file.name
 
 
 def delete_file(file_path: str) -> bool:
@@ -34,6 +41,11 @@ def delete_file(file_path: str) -> bool:
         return False
 
 
+async def delete_file_async(file_path: str) -> bool:
+    """Delete a file safely in a worker thread"""
+    return await asyncio.to_thread(delete_file, file_path)
+
+
 def get_file_extension(filename: str) -> str:
     """Extract file extension from filename"""
     return Path(filename).suffix.lower()
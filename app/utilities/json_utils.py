@@ -0,0 +1,109 @@
+"""
+JSON parsing utilities for AI model responses
+"""
+import re
+from typing import Any, AsyncIterator, Dict, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} object in text using a single-pass bracket scan"""
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def parse_json_response(response: str) -> Dict[str, Any]:
+    """Parse a JSON object from an AI response, tolerating markdown fences and surrounding text"""
+    # Fast path: the response is already a valid JSON object
+    try:
+        parsed = orjson.loads(response)
+        if isinstance(parsed, dict):
+            return parsed
+    except orjson.JSONDecodeError:
+        pass
+
+    cleaned = response.strip()
+    fence_match = _FENCE_RE.search(cleaned)
+    if fence_match:
+        cleaned = fence_match.group(1).strip()
+        try:
+            parsed = orjson.loads(cleaned)
+            if isinstance(parsed, dict):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
+
+    candidate = extract_json_object(cleaned)
+    if candidate is None:
+        raise orjson.JSONDecodeError("No JSON object found in response", cleaned, 0)
+    return orjson.loads(candidate)
+
+
+async def parse_json_stream(deltas: AsyncIterator[str]) -> Dict[str, Any]:
+    """Parse a JSON object from streamed text, returning as soon as the accumulated buffer is a complete object"""
+    # Text before the first '{' (a ```json fence or preamble) is kept only for the final fallback
+    skipped = []
+    parts = []
+    async for delta in deltas:
+        if not delta:
+            continue
+        if not parts:
+            start = delta.find('{')
+            if start == -1:
+                skipped.append(delta)
+                continue
+            skipped.append(delta[:start])
+            delta = delta[start:]
+        parts.append(delta)
+        # An object can only be complete after a closing brace, so skip the parse attempt otherwise
+        if '}' in delta:
+            try:
+                parsed = orjson.loads("".join(parts))
+                if isinstance(parsed, dict):
+                    return parsed
+            except orjson.JSONDecodeError:
+                pass
+    # Stream ended without a bare object (e.g. text between the braces and a closing fence)
+    return parse_json_response("".join(skipped + parts))
+
+
+def orjson_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively (MongoDB ObjectId)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes ObjectId values"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
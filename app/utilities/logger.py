@@ -1,21 +1,31 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
+from typing import Dict
 
-# Create logs directory
-Path("logs").mkdir(exist_ok=True)
+# Loggers already configured by setup_logger, keyed by name
+_LOGGERS: Dict[str, logging.Logger] = {}
 
 
 def setup_logger(name: str = "recruitment_app", level: int = logging.INFO):
     """Setup logger with file and console handlers with UTF-8 encoding support"""
+    if name in _LOGGERS:
+        return _LOGGERS[name]
     
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     # Avoid duplicate handlers
     if logger.handlers:
+        _LOGGERS[name] = logger
         return logger
     
+    # Create logs directory on first use rather than at import
+    Path("logs").mkdir(exist_ok=True)
+    
     # File handler with UTF-8 encoding
     file_handler = logging.FileHandler("logs/app.log", encoding='utf-8')
     file_handler.setLevel(level)
@@ -39,8 +49,17 @@ def setup_logger(name: str = "recruitment_app", level: int = logging.INFO):
         except Exception:
             pass  # Ignore if reconfiguration fails
     
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Records are only enqueued on the calling (event loop) thread; a listener
+    # thread does the file and console writes
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _LOGGERS[name] = logger
     
     return logger
 
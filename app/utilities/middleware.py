@@ -0,0 +1,62 @@
+"""
+ASGI middleware utilities
+"""
+import zlib
+
+from starlette.responses import JSONResponse
+
+# Upper bound on a decompressed request body (guards against gzip bombs)
+MAX_DECOMPRESSED_BODY_SIZE = 50 * 1024 * 1024
+
+
+class GZipRequestMiddleware:
+    """Transparently decompress request bodies sent with Content-Encoding: gzip"""
+
+    def __init__(self, app, max_body_size: int = MAX_DECOMPRESSED_BODY_SIZE):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = [(k, v) for k, v in scope["headers"] if k != b"content-encoding"]
+        encoding = next((v for k, v in scope["headers"] if k == b"content-encoding"), b"")
+        if encoding.strip().lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        try:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(b"".join(chunks), self.max_body_size)
+            if decompressor.unconsumed_tail:
+                response = JSONResponse({"detail": "Decompressed request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+        except zlib.error:
+            response = JSONResponse({"detail": "Invalid gzip request body"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        headers = [(k, v) for k, v in headers if k != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = dict(scope, headers=headers)
+
+        body_sent = False
+
+        async def receive_decompressed():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, receive_decompressed, send)
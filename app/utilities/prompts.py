@@ -1,16 +1,15 @@
 """
 Optimized prompts for AI operations with JSON output
 """
+import os
 
-GENERATE_JOB_DESCRIPTION = """Generate a comprehensive and professional job description for the following role:
+VERBOSE_PROMPTS = os.getenv("VERBOSE_PROMPTS", "false").lower() == "true"
 
-Job Title: {job_title}
-Years of Experience: {years_of_experience} years
-Must-Have Skills: {must_have_skills}
-Company Name: {company_name}
-Employment Type: {employment_type}
-Industry: {industry}
-Location: {location}
+# Prompts sent as system + user messages keep all static instructions in the
+# system message and only the per-request fields in the user message, so the
+# provider-side prompt cache can reuse the byte-identical prefix across calls.
+
+GENERATE_JOB_DESCRIPTION_SYSTEM = """You write comprehensive and professional job descriptions for the role described by the user.
 
 Please create a detailed job description that includes:
 1. Job Overview/Summary
@@ -23,156 +22,111 @@ Please create a detailed job description that includes:
 Make it professional, comprehensive, and appealing to potential candidates. Use clear section headers and bullet points for readability."""
 
 
-EXTRACT_RESUME_INFORMATION = """You are an expert resume parser. Extract detailed and accurate information from this resume and return ONLY a valid JSON object.
+GENERATE_JOB_DESCRIPTION = """Generate a job description for the following role:
+
+Job Title: {job_title}
+Years of Experience: {years_of_experience} years
+Must-Have Skills: {must_have_skills}
+Company Name: {company_name}
+Employment Type: {employment_type}
+Industry: {industry}
+Location: {location}"""
+
 
-##Resume:
-{resume_text}
+EXTRACT_RESUME_INFORMATION_SYSTEM = """You are an expert resume parser. Extract detailed and accurate information from the resume provided by the user and return ONLY a valid JSON object.
 
 Return this EXACT JSON structure (no markdown, no extra text):
 
-{{
-  "personal_info": {{
+{
+  "personal_info": {
     "name": "extracted name or Not specified",
     "email": "extracted email or Not specified",
     "phone": "extracted phone or Not specified",
     "location": "extracted location or Not specified"
-  }},
+  },
   "professional_summary": "2-3 sentence summary of background and expertise",
-  "experience": {{
+  "experience": {
     "total_years": 0,
     "relevant_experience": "Brief description of relevant work",
     "companies": ["Company1", "Company2"],
     "roles": ["Role1", "Role2"]
-  }},
+  },
   "projects": [
-    {{
+    {
       "project_title": "Project name or Not specified",
       "description": "Short description of the project",
       "technologies_used": ["Tech1", "Tech2"],
       "role": "Candidate's role in the project or Not specified",
       "duration": "Duration or Not specified"
-    }}
+    }
   ],
-  "skills": {{
+  "skills": {
     "technical_skills": ["Skill1", "Skill2", "Skill3"],
     "soft_skills": ["Skill1", "Skill2"],
     "certifications": ["Cert1", "Cert2"]
-  }},
-  "education": {{
+  },
+  "education": {
     "highest_degree": "Degree and field",
     "university": "University name or Not specified",
     "year": "Year or Not specified"
-  }},
+  },
   "strengths": ["Strength1", "Strength2", "Strength3"]
-}}
+}
 
 ##INSTRUCTIONS:
 1. Return ONLY the JSON object. No markdown code blocks or explanations.
 2. Extract skills even if they are mentioned in the summary, experience, or projects sections — not only in a 'Skills' section.
 3. Use empty arrays [] for missing lists, "Not specified" for missing text, and 0 for missing numbers.
 4. If multiple projects are found, include all in the 'projects' array.
-5. Ensure all JSON fields follow the exact structure and naming convention shown above.
-
-##Example Output:
-{{
-  "personal_info": {{
-    "name": "Rahul Sharma",
-    "email": "rahul.sharma@example.com",
-    "phone": "+91 9876543210",
-    "location": "Bangalore, India"
-  }},
-  "professional_summary": "Software Engineer with over 5 years of experience in backend development and cloud infrastructure. Skilled in designing scalable REST APIs and working with distributed systems.",
-  "experience": {{
-    "total_years": 5,
-    "relevant_experience": "Backend developer specializing in Python, Django, and AWS.",
-    "companies": ["Infosys", "TechNova Solutions"],
-    "roles": ["Software Engineer", "Backend Developer"]
-  }},
-  "projects": [
-    {{
-      "project_title": "E-commerce Platform Backend",
-      "description": "Developed and maintained REST APIs for an e-commerce application serving 10k+ daily users.",
-      "technologies_used": ["Python", "Django", "PostgreSQL", "AWS"],
-      "role": "Backend Developer",
-      "duration": "Jan 2021 - Dec 2022"
-    }},
-    {{
-      "project_title": "Customer Analytics Dashboard",
-      "description": "Built a data visualization tool for tracking customer engagement metrics.",
-      "technologies_used": ["React", "Flask", "MongoDB"],
-      "role": "Full Stack Developer",
-      "duration": "Mar 2019 - Dec 2020"
-    }}
-  ],
-  "skills": {{
-    "technical_skills": ["Python", "Django", "Flask", "AWS", "PostgreSQL", "React"],
-    "soft_skills": ["Communication", "Problem Solving", "Team Collaboration"],
-    "certifications": ["AWS Certified Developer – Associate"]
-  }},
-  "education": {{
-    "highest_degree": "B.Tech in Computer Science",
-    "university": "IIT Delhi",
-    "year": "2018"
-  }},
-  "strengths": ["Analytical thinking", "Adaptability", "Leadership"]
-}}
+5. Ensure all JSON fields follow the exact structure and naming convention shown above."""
 
-"""
 
+EXTRACT_RESUME_INFORMATION = """##Resume:
+{resume_text}"""
 
-EXTRACT_JD_INFORMATION = """You are an expert job description analyzer. Extract key information and return ONLY a valid JSON object.
 
-Job Description:
-{job_description}
+EXTRACT_JD_INFORMATION_SYSTEM = """You are an expert job description analyzer. Extract key information from the job description provided by the user and return ONLY a valid JSON object.
 
 Return this EXACT JSON structure (no markdown, no extra text):
 
-{{
+{
   "job_title": "extracted job title",
-  "requirements": {{
+  "requirements": {
     "years_of_experience": 0,
     "required_skills": ["Skill1", "Skill2", "Skill3"],
     "nice_to_have_skills": ["Skill1", "Skill2"]
-  }},
+  },
   "responsibilities": ["Responsibility1", "Responsibility2"],
-  "qualifications": {{
+  "qualifications": {
     "required": ["Qualification1", "Qualification2"],
     "preferred": ["Qualification1", "Qualification2"]
-  }},
-  "company_info": {{
+  },
+  "company_info": {
     "company_name": "Company or Not specified",
     "location": "Location",
     "employment_type": "Full-time/Part-time/etc"
-  }}
-}}
+  }
+}
 
 CRITICAL: Return ONLY the JSON object. No markdown code blocks. Use empty arrays [] for missing lists and "Not specified" for missing information."""
 
 
-INTELLIGENT_MATCH = """You are an expert technical recruiter and talent analyst. Your task is to evaluate how well a candidate fits a given job role based on their resume and the job description.
+EXTRACT_JD_INFORMATION = """Job Description:
+{job_description}"""
 
-CANDIDATE PROFILE SUMMARY:
-{resume_summary}
-
-JOB REQUIREMENTS SUMMARY:
-{jd_summary}
 
-FULL RESUME (first 1500 characters for context):
-{resume_text}
-
-FULL JOB DESCRIPTION:
-{jd_text}
+_INTELLIGENT_MATCH_SYSTEM_VERBOSE = """You are an expert technical recruiter and talent analyst. Your task is to evaluate how well a candidate fits a given job role based on their resume and the job description provided by the user.
 
 Your goal is to provide an accurate, evidence-based, and structured evaluation of the match.
 
 Return ONLY a valid JSON object in the EXACT format below (no markdown, no extra text, no explanations):
 
-{{
+{
   "score": 85,
   "missing_skills": ["Skill1", "Skill2"],
   "matching_skills": ["Skill1", "Skill2", "Skill3"],
   "remarks": "2-3 sentence summary of overall fit, key considerations with strengths and weaknesses."
-}}
+}
 
 EVALUATION GUIDELINES:
 1. Match Analysis:
@@ -206,62 +160,76 @@ EVALUATION GUIDELINES:
    - remarks: Provide 2-3 sentences key summary with strengths and weaknesses.
      
 5. Output Format:
-   - The response must be valid JSON only — no markdown, commentary, or extra text.
+   - The response must be valid JSON only — no markdown, commentary, or extra text."""
 
-"""
 
+_INTELLIGENT_MATCH_SYSTEM_COMPACT = """You are an expert technical recruiter and talent analyst. Evaluate how well a candidate fits a given job role based on their resume and the job description provided by the user.
 
-GENERATE_INTERVIEW_EMAIL = """Generate a professional interview invitation email with personalized insights from resume matching.
+Return ONLY a valid JSON object in the EXACT format below (no markdown, no extra text, no explanations):
 
-CANDIDATE INFO:
-Name: {candidate_name}
-Email: {candidate_email}
-Score: {score}%
+{
+  "score": 85,
+  "missing_skills": ["Skill1", "Skill2"],
+  "matching_skills": ["Skill1", "Skill2", "Skill3"],
+  "remarks": "2-3 sentence summary of overall fit, key considerations with strengths and weaknesses."
+}
 
-RESUME MATCHING SUMMARY:
-{matching_summary}
+RUBRIC (score = sum of the parts, 0-100):
+- Skills 0-70: explicit and implied skills (tools, technologies, described work) from all resume sections vs. the job requirements
+- Experience 0-10: duration and relevance for the role
+- Education 0-10: relevance to the job domain
+- Overall fit 0-10: versatility and alignment with the role
+Bands: 90-100 excellent, 75-89 strong, 60-74 good, 40-59 moderate, 0-39 poor.
+missing_skills: job description skills not found in the resume. matching_skills: directly matching or closely related skills. remarks: 2-3 sentences on strengths and weaknesses."""
 
-JOB DETAILS:
-Position: {job_title}
-Company: {company_name}
 
-HIRING MANAGER:
-{manager_name}
+# The compact rubric scores the same weights and bands in fewer tokens;
+# VERBOSE_PROMPTS=true restores the original wording
+INTELLIGENT_MATCH_SYSTEM = _INTELLIGENT_MATCH_SYSTEM_VERBOSE if VERBOSE_PROMPTS else _INTELLIGENT_MATCH_SYSTEM_COMPACT
 
-Create a warm, professional email that:
-1. Congratulates the candidate on being shortlisted
-2. Mentions specific strengths and matching skills from the resume analysis
-3. References their relevant experience and achievements
-4. Highlights why they're a great fit for the role
-5. Proposes interview scheduling
-6. Includes next steps
+
+# Per-job fields first, so matches against the same JD share the longer prefix
+INTELLIGENT_MATCH = """JOB REQUIREMENTS SUMMARY:
+{jd_summary}
+
+CANDIDATE PROFILE SUMMARY:
+{resume_summary}
+
+RESUME EVIDENCE (sentences most relevant to the required skills):
+{evidence_snippets}"""
+
+
+# Shared first, so interview and rejection emails send a byte-identical prefix
+_EMAIL_BASE = """You generate personalized recruitment emails using insights from resume matching.
+
+The user provides the candidate info, resume matching summary, job details and hiring manager.
 
 Return in this EXACT JSON format (no markdown, no extra text):
 
-{{
-  "subject": "Interview Invitation - [Position] at [Company]",
+{
+  "subject": "Email subject line",
   "body": "Full email body with proper formatting and line breaks"
-}}
+}
 
-Make it personalized, professional, and encouraging. Use specific details from the matching summary to create a truly personalized experience. Return ONLY the JSON object."""
+Return ONLY the JSON object.
 
+"""
 
-GENERATE_REJECTION_EMAIL = """Generate a respectful rejection email with personalized feedback from resume matching.
 
-CANDIDATE INFO:
-Name: {candidate_name}
-Email: {candidate_email}
-Score: {score}%
+GENERATE_INTERVIEW_EMAIL_SYSTEM = _EMAIL_BASE + """Write a professional interview invitation with the subject "Interview Invitation - [Position] at [Company]".
 
-RESUME MATCHING SUMMARY:
-{matching_summary}
+Create a warm, professional email that:
+1. Congratulates the candidate on being shortlisted
+2. Mentions specific strengths and matching skills from the resume analysis
+3. References their relevant experience and achievements
+4. Highlights why they're a great fit for the role
+5. Proposes interview scheduling
+6. Includes next steps
 
-JOB DETAILS:
-Position: {job_title}
-Company: {company_name}
+Make it personalized, professional, and encouraging. Use specific details from the matching summary to create a truly personalized experience."""
 
-HIRING MANAGER:
-{manager_name}
+
+GENERATE_REJECTION_EMAIL_SYSTEM = _EMAIL_BASE + """Write a respectful rejection email with the subject "Application Update - [Position] at [Company]".
 
 Create a respectful, encouraging email that:
 1. Thanks them for their interest and time
@@ -271,11 +239,90 @@ Create a respectful, encouraging email that:
 5. Encourages future applications
 6. Wishes them well in their search
 
-Return in this EXACT JSON format (no markdown, no extra text):
+Make it respectful, encouraging, and personalized. Use insights from the matching summary to provide meaningful feedback."""
 
-{{
-  "subject": "Application Update - [Position] at [Company]",
-  "body": "Full email body with proper formatting and line breaks"
-}}
 
-Make it respectful, encouraging, and personalized. Use insights from the matching summary to provide meaningful feedback. Return ONLY the JSON object."""
\ No newline at end of file
+# Per-candidate fields shared by the interview and rejection emails; the
+# per-job fields come first so one hiring run's emails share a longer prefix
+GENERATE_EMAIL_DETAILS = """JOB DETAILS:
+Position: {job_title}
+Company: {company_name}
+
+HIRING MANAGER:
+{manager_name}
+
+CANDIDATE INFO:
+Name: {candidate_name}
+Email: {candidate_email}
+Score: {score}%
+
+RESUME MATCHING SUMMARY:
+{matching_summary}"""
+
+
+def _strict_object(properties: dict) -> dict:
+    """JSON Schema object with every property required, as strict structured outputs expect"""
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+_STRING = {"type": "string"}
+_STRINGS = {"type": "array", "items": _STRING}
+
+# JSON Schemas of the JSON responses above. Providers with structured
+# outputs (OpenAI-compatible, Ollama) constrain decoding to them; the others
+# rely on the structure spelled out in the system prompt.
+RESUME_SCHEMA = _strict_object({
+    "personal_info": _strict_object({"name": _STRING, "email": _STRING, "phone": _STRING, "location": _STRING}),
+    "professional_summary": _STRING,
+    "experience": _strict_object({
+        "total_years": {"type": "number"},
+        "relevant_experience": _STRING,
+        "companies": _STRINGS,
+        "roles": _STRINGS
+    }),
+    "projects": {"type": "array", "items": _strict_object({
+        "project_title": _STRING,
+        "description": _STRING,
+        "technologies_used": _STRINGS,
+        "role": _STRING,
+        "duration": _STRING
+    })},
+    "skills": _strict_object({"technical_skills": _STRINGS, "soft_skills": _STRINGS, "certifications": _STRINGS}),
+    "education": _strict_object({"highest_degree": _STRING, "university": _STRING, "year": _STRING}),
+    "strengths": _STRINGS
+})
+
+JD_SCHEMA = _strict_object({
+    "job_title": _STRING,
+    "requirements": _strict_object({
+        "years_of_experience": {"type": "number"},
+        "required_skills": _STRINGS,
+        "nice_to_have_skills": _STRINGS
+    }),
+    "responsibilities": _STRINGS,
+    "qualifications": _strict_object({"required": _STRINGS, "preferred": _STRINGS}),
+    "company_info": _strict_object({"company_name": _STRING, "location": _STRING, "employment_type": _STRING})
+})
+
+MATCH_SCHEMA = _strict_object({
+    "score": {"type": "number"},
+    "missing_skills": _STRINGS,
+    "matching_skills": _STRINGS,
+    "remarks": _STRING
+})
+
+EMAIL_SCHEMA = _strict_object({"subject": _STRING, "body": _STRING})
+
+# json_schema arguments (OpenAI response_format shape) for the JSON calls
+RESUME_JSON_SCHEMA = {"name": "resume_information", "schema": RESUME_SCHEMA, "strict": True}
+JD_JSON_SCHEMA = {"name": "jd_information", "schema": JD_SCHEMA, "strict": True}
+MATCH_JSON_SCHEMA = {"name": "match_result", "schema": MATCH_SCHEMA, "strict": True}
+EMAIL_JSON_SCHEMA = {"name": "email", "schema": EMAIL_SCHEMA, "strict": True}
+
+
+def build_messages(system_prompt: str, user_prompt: str) -> list:
+    """Build a system + user chat message list"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]